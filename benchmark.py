@@ -0,0 +1,321 @@
+import argparse
+import datetime
+import decimal
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+BENCH_SCHEMA = 'main'
+BENCH_TABLE = 'bench_items'
+
+# MSSQL tipi -> (INFORMATION_SCHEMA satırı, SQLite kolon tipi, değer üreteci)
+BENCH_TYPES = {
+    'int': (('int', None, 10, 0, None, 0, None, None), 'integer', lambda rnd: rnd.randint(-2 ** 31, 2 ** 31 - 1)),
+    'bigint': (('bigint', None, 19, 0, None, 0, None, None), 'integer', lambda rnd: rnd.randint(-2 ** 63, 2 ** 63 - 1)),
+    'smallint': (('smallint', None, 5, 0, None, 0, None, None), 'integer', lambda rnd: rnd.randint(-2 ** 15, 2 ** 15 - 1)),
+    'tinyint': (('tinyint', None, 3, 0, None, 0, None, None), 'integer', lambda rnd: rnd.randint(0, 255)),
+    'bit': (('bit', None, None, None, None, 0, None, None), 'integer', lambda rnd: rnd.randint(0, 1)),
+    'float': (('float', None, 53, None, None, 0, None, None), 'real', lambda rnd: rnd.uniform(-1e6, 1e6)),
+    'decimal': (('decimal', None, 12, 2, None, 0, None, None), 'decimal',
+                lambda rnd: decimal.Decimal(rnd.randint(-10 ** 9, 10 ** 9)) / 100),
+    'money': (('money', None, 19, 4, None, 0, None, None), 'decimal',
+              lambda rnd: decimal.Decimal(rnd.randint(-10 ** 9, 10 ** 9)) / 10000),
+    'nvarchar': (('nvarchar', 100, None, None, None, 0, None, None), 'text',
+                 lambda rnd: ''.join(rnd.choices('abcdefghijklmnopqrstuvwxyzçğıöşü ', k=rnd.randint(5, 100)))),
+    'char': (('char', 10, None, None, None, 0, None, None), 'text',
+             lambda rnd: ''.join(rnd.choices('ABCDEFGHIJ0123456789', k=10))),
+    'date': (('date', None, None, None, 0, 0, None, None), 'date',
+             lambda rnd: datetime.date(2000, 1, 1) + datetime.timedelta(days=rnd.randint(0, 10000))),
+    'datetime': (('datetime', None, None, None, 3, 0, None, None), 'datetime',
+                 lambda rnd: datetime.datetime(2000, 1, 1) + datetime.timedelta(
+                     seconds=rnd.randint(0, 10 ** 9), milliseconds=rnd.randint(0, 999))),
+    'datetime2': (('datetime2', None, None, None, 7, 0, None, None), 'datetime',
+                  lambda rnd: datetime.datetime(2000, 1, 1) + datetime.timedelta(
+                      seconds=rnd.randint(0, 10 ** 9), microseconds=rnd.randint(0, 999999))),
+    'uniqueidentifier': (('uniqueidentifier', None, None, None, None, 0, None, None), 'text',
+                         lambda rnd: str(uuid.UUID(int=rnd.getrandbits(128))).upper()),
+}
+DEFAULT_BENCH_COLUMNS = 'int,nvarchar,decimal,datetime2,bit,uniqueidentifier'
+
+sqlite3.register_adapter(decimal.Decimal, str)
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_converter('decimal', lambda value: decimal.Decimal(value.decode()))
+sqlite3.register_converter('datetime', lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('date', lambda value: datetime.date.fromisoformat(value.decode()))
+
+
+class SourceSession(Session):
+    # SQLite'ta TOP yok, ilk yükleme sorgusu LIMIT'e çevrilir
+    def execute(self, statement, *args, **kwargs):
+        match = re.match(r"SELECT TOP \((\d+)\) (.*)$", str(statement), re.S)
+        if match:
+            statement = text(f"SELECT {match.group(2)} LIMIT {match.group(1)}")
+        return super().execute(statement, *args, **kwargs)
+
+
+def create_sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={'detect_types': sqlite3.PARSE_DECLTYPES})
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+    return engine
+
+
+def create_bench_table(engine, column_types):
+    columns = ', '.join(f"c{index}_{data_type} {BENCH_TYPES[data_type][1]}"
+                        for index, data_type in enumerate(column_types))
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE {BENCH_TABLE} (id integer PRIMARY KEY, {columns}, "
+                                f"row_version integer)"))
+
+
+class ChangeGenerator:
+    def __init__(self, engine, column_types, seed):
+        self.engine = engine
+        self.column_types = column_types
+        self.random = random.Random(seed)
+        self.ids = []
+        self.next_id = 1
+        self.version = 0
+
+    def values(self, row_id):
+        self.version += 1
+        row = {'id': row_id, 'row_version': self.version}
+        for index, data_type in enumerate(self.column_types):
+            row[f"c{index}_{data_type}"] = BENCH_TYPES[data_type][2](self.random)
+        return row
+
+    def insert(self, count):
+        names = ['id'] + [f"c{index}_{data_type}" for index, data_type in enumerate(self.column_types)] + ['row_version']
+        statement = text(f"INSERT INTO {BENCH_TABLE} ({', '.join(names)}) "
+                         f"VALUES ({', '.join(':' + name for name in names)})")
+
+        with self.engine.begin() as connection:
+            for start in range(0, count, 10000):
+                rows = [self.values(self.next_id + offset) for offset in range(min(10000, count - start))]
+                connection.execute(statement, rows)
+                self.ids.extend(row['id'] for row in rows)
+                self.next_id += len(rows)
+
+    def apply(self, insert_rate, update_rate, delete_rate):
+        table_rows = len(self.ids)
+        updates = self.random.sample(self.ids, min(table_rows, int(table_rows * update_rate)))
+        deletes = set(self.random.sample(self.ids, min(table_rows, int(table_rows * delete_rate))))
+
+        if updates:
+            names = [f"c{index}_{data_type}" for index, data_type in enumerate(self.column_types)] + ['row_version']
+            statement = text(f"UPDATE {BENCH_TABLE} SET {', '.join(f'{name} = :{name}' for name in names)} "
+                             f"WHERE id = :id")
+            with self.engine.begin() as connection:
+                connection.execute(statement, [self.values(row_id) for row_id in updates])
+
+        if deletes:
+            with self.engine.begin() as connection:
+                connection.execute(text(f"DELETE FROM {BENCH_TABLE} WHERE id = :id"),
+                                   [{'id': row_id} for row_id in deletes])
+            self.ids = [row_id for row_id in self.ids if row_id not in deletes]
+
+        self.insert(int(table_rows * insert_rate))
+
+
+def sqlite_table_exists(cursor_target, target_table):
+    query = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+    return cursor_target.execute(query, {'name': target_table}).first() is not None
+
+
+def run_cycle(main, mode, cycle, table, sync_config, table_state, source_pool, target_engine, table_rows, trace_memory):
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    stats, state_update = main.sync_table(table, sync_config, table_state, source_pool, target_engine)
+    duration = time.perf_counter() - start
+    if state_update:
+        main.update_sync_state(BENCH_TABLE, state_update)
+
+    summary = main.finish_cycle(duration).get('tables', {}).get(BENCH_TABLE, {})
+    written = stats['inserted'] + stats['updated'] + stats['deleted']
+    return {
+        'mode': mode,
+        'cycle': cycle,
+        'table_rows': table_rows,
+        'inserted': stats['inserted'],
+        'updated': stats['updated'],
+        'deleted': stats['deleted'],
+        'duration_seconds': round(duration, 4),
+        'rows_per_second': round(table_rows / duration, 1) if duration else None,
+        'writes_per_second': round(written / duration, 1) if duration else None,
+        'round_trips': {database: int(count) for database, count in summary.get('round_trips', {}).items()},
+        'phase_seconds': summary.get('phase_seconds', {}),
+        'peak_memory_bytes': tracemalloc.get_traced_memory()[1] if trace_memory else None,
+    }
+
+
+def run_mode(main, mode, args, column_types, workdir):
+    mode_dir = os.path.join(workdir, mode)
+    os.makedirs(mode_dir, exist_ok=True)
+    for name in os.listdir(mode_dir):
+        if name.startswith(('source.db', 'target.db')):
+            os.remove(os.path.join(mode_dir, name))
+
+    source_engine = create_sqlite_engine(os.path.join(mode_dir, 'source.db'))
+    target_engine = create_sqlite_engine(os.path.join(mode_dir, 'target.db'))
+    main.count_round_trips(source_engine, 'mssql')
+    main.count_round_trips(target_engine, 'mysql')
+    source_pool = sessionmaker(bind=source_engine, class_=SourceSession)
+
+    create_bench_table(source_engine, column_types)
+    create_bench_table(target_engine, column_types)
+    changes = ChangeGenerator(source_engine, column_types, args.seed)
+    changes.insert(args.rows)
+
+    table = {
+        'source_schema': BENCH_SCHEMA,
+        'source_table': BENCH_TABLE,
+        'table_as_is': 1,
+        'column_as_is': 1,
+        'id_column': 'id',
+        'watermark_column': 'row_version',
+        'full_sync_interval': 10 ** 9,
+        'streaming': 1 if mode == 'streaming' else 0,
+        'snapshot': 1 if mode == 'snapshot' else 0,
+    }
+    sync_config = {
+        'batch_size': args.batch_size,
+        'fetch_size': args.fetch_size,
+        'initial_load_chunk_size': args.initial_load_chunk_size,
+        'max_deletes': None,
+        'tables': [table],
+    }
+
+    # Tam turlarda durum verilmez, böylece watermark olsa da bütün tablo karşılaştırılır. Snapshot doğrulama zamanı
+    # korunur, yoksa her tam tur MySQL'e karşı doğrulama yapardı
+    cycles = [('initial_load', False), ('full_unchanged', False)]
+    cycles += [('full', False)] * args.cycles + [('incremental', True)] * args.cycles
+
+    results = []
+    for cycle, incremental in cycles:
+        if cycle in ('full', 'incremental'):
+            changes.apply(args.insert_rate, args.update_rate, args.delete_rate)
+
+        table_state = main.load_sync_state().get(BENCH_TABLE, {})
+        if not incremental:
+            table_state = {key: value for key, value in table_state.items() if key == 'snapshot_verified'}
+        result = run_cycle(main, mode, cycle, table, sync_config, table_state, source_pool, target_engine,
+                           len(changes.ids), args.trace_memory)
+        results.append(result)
+        logging.info(f"{mode} {cycle}: {json.dumps(result)}")
+
+    main.close_worker_connections()
+    source_engine.dispose()
+    target_engine.dispose()
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark sync_data against local SQLite stand-ins for MSSQL "
+                                                 "and MySQL, and print the results as JSON.")
+    parser.add_argument('--rows', type=int, default=100000, help="Rows in the synthetic source table.")
+    parser.add_argument('--columns', default=DEFAULT_BENCH_COLUMNS,
+                        help=f"Comma separated MSSQL column types ({', '.join(BENCH_TYPES)}).")
+    parser.add_argument('--modes', default='rows,streaming',
+                        help="Comma separated reconcile modes: rows, streaming, snapshot.")
+    parser.add_argument('--cycles', type=int, default=3, help="Full and incremental cycles run after the initial load.")
+    parser.add_argument('--insert-rate', type=float, default=0.01, help="Share of rows inserted before each cycle.")
+    parser.add_argument('--update-rate', type=float, default=0.01, help="Share of rows updated before each cycle.")
+    parser.add_argument('--delete-rate', type=float, default=0.005, help="Share of rows deleted before each cycle.")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--fetch-size', type=int, default=10000)
+    parser.add_argument('--initial-load-chunk-size', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-trace-memory', dest='trace_memory', action='store_false',
+                        help="Skip tracemalloc, which slows the run down, and report no peak memory.")
+    parser.add_argument('--workdir', help="Directory for the SQLite files and state file (default: a temp dir).")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args()
+
+
+def run_benchmark(args):
+    column_types = [data_type.strip() for data_type in args.columns.split(',') if data_type.strip()]
+    for data_type in column_types:
+        if data_type not in BENCH_TYPES:
+            raise Exception(f"Unsupported benchmark column type: {data_type}")
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    for mode in modes:
+        if mode not in ('rows', 'streaming', 'snapshot'):
+            raise Exception(f"Unsupported benchmark mode: {mode}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='sync-benchmark-')
+    os.makedirs(workdir, exist_ok=True)
+
+    # Durum dosyası ve snapshot dizininin yolları main import edilirken okunur
+    os.environ['SYNC_STATE_FILE'] = os.path.join(workdir, 'sync_state.json')
+    os.environ['SYNC_SNAPSHOT_DIR'] = os.path.join(workdir, 'snapshots')
+    import main
+
+    # Kaynak şeması INFORMATION_SCHEMA yerine önbelleğe hazır verilir, hedefte SHOW TABLES yerine sqlite_master okunur
+    main.schema_cache[(BENCH_SCHEMA, BENCH_TABLE)] = {
+        'columns': dict([('id', BENCH_TYPES['bigint'][0])] +
+                        [(f"c{index}_{data_type}", BENCH_TYPES[data_type][0])
+                         for index, data_type in enumerate(column_types)] +
+                        [('row_version', BENCH_TYPES['bigint'][0])]),
+        'modify_date': None,
+        'checked_at': float('inf'),
+    }
+    main.target_table_exists = sqlite_table_exists
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = []
+    for mode in modes:
+        if os.path.exists(os.environ['SYNC_STATE_FILE']):
+            os.remove(os.environ['SYNC_STATE_FILE'])
+        if os.path.isdir(main.SNAPSHOT_DIR):
+            shutil.rmtree(main.SNAPSHOT_DIR)
+        results.extend(run_mode(main, mode, args, column_types, workdir))
+
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    return {
+        'config': {
+            'rows': args.rows,
+            'columns': column_types,
+            'cycles': args.cycles,
+            'insert_rate': args.insert_rate,
+            'update_rate': args.update_rate,
+            'delete_rate': args.delete_rate,
+            'batch_size': args.batch_size,
+            'fetch_size': args.fetch_size,
+            'initial_load_chunk_size': args.initial_load_chunk_size,
+            'trace_memory': args.trace_memory,
+        },
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    report = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(report + '\n')
+    else:
+        print(report)
@@ -1,25 +1,323 @@
 from dotenv import load_dotenv
+import argparse
 import os
 import json
 import time
-import binascii
 import logging
-from sqlalchemy import create_engine, text
+import logging.handlers
+import queue
+import atexit
+import math
+import mmap
+import hashlib
+import sqlite3
+import struct
+import tempfile
+from array import array
+import random
+import sys
+from sqlalchemy import bindparam, create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 import datetime
+import decimal
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 load_dotenv()
 
-# Logging configuration
-log_filename = f"{datetime.datetime.now().strftime('%Y-%m-%d')}.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s %(levelname)s %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()
-    ]
-)
+BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '1000'))
+DELETE_CHUNK_SIZE = int(os.getenv('SYNC_DELETE_CHUNK_SIZE', '1000'))
+MAX_DELETES = int(os.getenv('SYNC_MAX_DELETES')) if os.getenv('SYNC_MAX_DELETES') else None
+FULL_SYNC_INTERVAL = int(os.getenv('SYNC_FULL_SYNC_INTERVAL', '3600'))
+WATERMARK_MARGIN = float(os.getenv('SYNC_WATERMARK_MARGIN', '60'))
+SYNC_STATE_FILE = os.getenv('SYNC_STATE_FILE', 'sync_state.json')
+SCHEMA_CACHE_TTL = int(os.getenv('SCHEMA_CACHE_TTL', '300'))
+SYNC_WORKERS = int(os.getenv('SYNC_WORKERS', '1'))
+STREAMING = os.getenv('SYNC_STREAMING', '0') == '1'
+FETCH_SIZE = int(os.getenv('SYNC_FETCH_SIZE', '10000'))
+INITIAL_LOAD_CHUNK_SIZE = int(os.getenv('SYNC_INITIAL_LOAD_CHUNK_SIZE', '50000'))
+# MSSQL bir sorguda en fazla 2100 parametre kabul eder
+SOURCE_KEY_CHUNK_SIZE = 1000
+INTEGER_TYPES = ('bigint', 'int', 'smallint', 'tinyint')
+# INFORMATION_SCHEMA rowversion kolonlarını timestamp olarak raporlar
+ROWVERSION_TYPES = ('timestamp', 'rowversion')
+# Hash metni değeri kayıpsız taşıyan anahtar tipleri; bunlarda anahtarın kendisi yerine MD5 özeti indekslenebilir
+DIGEST_KEY_TYPES = ('char', 'varchar', 'nchar', 'nvarchar', 'uniqueidentifier')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+MSSQL_HASH_SEPARATOR = " + N'|' + "
+HASH_NULL = '~NULL~'
+# pyodbc'nin okuyamadığı DATETIMEOFFSET tipinin ODBC kodu (SQLNCLI.h)
+SQL_SS_TIMESTAMPOFFSET = -155
+# Hedefteki FLOAT tek duyarlıklıdır ve bu kadar anlamlı haneyi her zaman aynen geri verir
+FLOAT_DIGITS = 6
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.getenv('LOG_FILE', 'sync.log')
+LOG_ROTATION = os.getenv('LOG_ROTATION', 'time')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '7'))
+LOG_STATEMENTS = os.getenv('LOG_STATEMENTS', '0') == '1'
+POOL_RECYCLE = int(os.getenv('SYNC_POOL_RECYCLE', '1800'))
+CONNECTION_CHECK_INTERVAL = int(os.getenv('SYNC_CONNECTION_CHECK_INTERVAL', '60'))
+MSSQL_ISOLATION_LEVEL = os.getenv('MSSQL_ISOLATION_LEVEL')
+MYSQL_ISOLATION_LEVEL = os.getenv('MYSQL_ISOLATION_LEVEL')
+MYSQL_MAX_STATEMENT_BYTES = int(os.getenv('MYSQL_MAX_STATEMENT_BYTES', str(16 * 1024 * 1024)))
+RECONNECT_BASE_DELAY = float(os.getenv('SYNC_RECONNECT_BASE_DELAY', '1'))
+RECONNECT_MAX_DELAY = float(os.getenv('SYNC_RECONNECT_MAX_DELAY', '300'))
+KEY_INDEX_MEMORY_LIMIT = int(os.getenv('SYNC_KEY_INDEX_MEMORY_MB', '256')) * 1024 * 1024
+# Anahtar dizilerinin eşit parçaları tek karşılaştırmayla atlanır
+KEY_INDEX_RUN = 1024
+SNAPSHOT_DIR = os.getenv('SYNC_SNAPSHOT_DIR', 'snapshots')
+SNAPSHOT_VERIFY_INTERVAL = int(os.getenv('SYNC_SNAPSHOT_VERIFY_INTERVAL', '86400'))
+# Eski SQLite sürümleri bir sorguda en fazla 999 parametre kabul eder
+SNAPSHOT_KEY_CHUNK_SIZE = 500
+# Zamanlayıcı planladığı uyanma zamanından bu kadar saniye sonra hâlâ dönmemişse canlılık kontrolü başarısız olur
+LIVENESS_GRACE = int(os.getenv('SYNC_LIVENESS_GRACE', '60'))
+COMPARE_MODES = ('rows', 'hash')
+# .env'deki MYSQL_* bağlantısı; ek hedefler conf.json'daki mysql_targets ile tanımlanır
+DEFAULT_TARGET = 'default'
+CHANGE_SOURCES = ('change_tracking', 'cdc')
+# Pozitif sayı olması gereken ayarlar, hem tablo hem üst seviyede
+POSITIVE_OPTIONS = ('batch_size', 'delete_chunk_size', 'fetch_size', 'initial_load_chunk_size', 'hash_block_size',
+                    'frequency', 'max_frequency', 'backoff_factor', 'full_sync_interval', 'snapshot_verify_interval',
+                    'workers')
+
+# (schema, table) -> kolon metadata, bkz. get_table_metadata
+schema_cache = {}
+sync_state_lock = threading.Lock()
+# (kind, table, columns, ...) -> derlenmiş text() ifadesi, bkz. get_statement
+statement_cache = {}
+# thread id -> havuz -> işçinin turlar arasında açık tuttuğu bağlantı, bkz. get_worker_connection
+worker_connections = {}
+worker_connections_lock = threading.Lock()
+# isim -> DatabaseConnector (hazırlık kontrolü) ve zamanlayıcının bir sonraki tur için son tarihi (canlılık kontrolü)
+databases = {}
+probe_state = {'scheduler_deadline': None}
+AUDIT_DATE_COLUMNS = ('CREATE_DATE', 'MODIFY_DATE', 'created_at', 'modified_at')
+
+
+def setup_logging():
+    # Dosya ve konsol yazımı arka planda QueueListener thread'inde yapılır, senkronizasyon thread'leri beklemez
+    if LOG_ROTATION == 'size':
+        file_handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES,
+                                                            backupCount=LOG_BACKUP_COUNT)
+    else:
+        file_handler = logging.handlers.TimedRotatingFileHandler(LOG_FILE, when='midnight',
+                                                                 backupCount=LOG_BACKUP_COUNT)
+
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+    handlers = [file_handler, logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(LOG_LEVEL)
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+# Metrik türü -> etiket adları; sayaçlar her tur sonunda toplamlara eklenir
+METRIC_LABELS = {
+    'phase_seconds': ('table', 'phase'),
+    'rows': ('table', 'operation'),
+    'round_trips': ('table', 'database'),
+    'pool_wait_seconds': ('database',),
+    'connect_seconds': ('database',),
+    'errors': ('table',),
+}
+GAUGE_LABELS = {
+    'table_duration_seconds': ('table',),
+    'last_success_timestamp_seconds': ('table',),
+    'cycle_duration_seconds': (),
+}
+
+metrics_lock = threading.Lock()
+metrics_context = threading.local()
+cycle_metrics = defaultdict(lambda: defaultdict(float))
+metrics_totals = defaultdict(lambda: defaultdict(float))
+metrics_gauges = defaultdict(dict)
+
+
+def current_table():
+    return getattr(metrics_context, 'table', '')
+
+
+def record_metric(kind, labels, value=1):
+    with metrics_lock:
+        cycle_metrics[kind][labels] += value
+
+
+def set_gauge(name, labels, value):
+    with metrics_lock:
+        metrics_gauges[name][labels] = value
+
+
+@contextmanager
+def track_phase(phase):
+    # İç içe çağrılarda aynı faz iki kez sayılmaz
+    active_phases = metrics_context.__dict__.setdefault('phases', set())
+    if phase in active_phases:
+        yield
+        return
+
+    active_phases.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active_phases.discard(phase)
+        record_metric('phase_seconds', (current_table(), phase), time.perf_counter() - start)
+
+
+def timed_rows(rows, phase):
+    # Streaming modunda okuma süresi satır satır toplanır, kilit sadece sonda alınır
+    elapsed = 0.0
+    rows = iter(rows)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield row
+    finally:
+        record_metric('phase_seconds', (current_table(), phase), elapsed)
+
+
+def count_round_trips(engine, database):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_metric('round_trips', (current_table(), database))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def finish_cycle(duration):
+    with metrics_lock:
+        summary = {'duration': round(duration, 3), 'tables': {}, 'pool_wait_seconds': {}}
+
+        for kind, values in cycle_metrics.items():
+            for labels, value in values.items():
+                metrics_totals[kind][labels] += value
+
+                if kind == 'pool_wait_seconds':
+                    summary['pool_wait_seconds'][labels[0]] = round(value, 3)
+                elif METRIC_LABELS[kind][0] == 'table' and labels[0]:
+                    table_summary = summary['tables'].setdefault(labels[0], {})
+                    if len(labels) == 1:
+                        table_summary[kind] = value
+                    else:
+                        table_summary.setdefault(kind, {})[labels[1]] = round(value, 3)
+
+        cycle_metrics.clear()
+        metrics_gauges['cycle_duration_seconds'][()] = duration
+
+    logging.info(f"Cycle summary: {json.dumps(summary)}")
+    return summary
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, values)) + '}'
+
+
+def render_metrics():
+    lines = []
+    with metrics_lock:
+        for kind, label_names in METRIC_LABELS.items():
+            lines.append(f"# TYPE dbsync_{kind}_total counter")
+            for labels, value in metrics_totals.get(kind, {}).items():
+                lines.append(f"dbsync_{kind}_total{format_labels(label_names, labels)} {value}")
+
+        for name, label_names in GAUGE_LABELS.items():
+            lines.append(f"# TYPE dbsync_{name} gauge")
+            for labels, value in metrics_gauges.get(name, {}).items():
+                lines.append(f"dbsync_{name}{format_labels(label_names, labels)} {value}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def probe_status(kind):
+    # Canlılık sadece zamanlayıcının dönmesine bakar; veritabanı erişilemiyor diye servis yeniden başlatılmaz
+    deadline = probe_state['scheduler_deadline']
+    alive = deadline is None or time.monotonic() <= deadline
+    ready = bool(databases) and all(database.pool is not None for database in databases.values())
+    healthy = alive if kind == 'live' else alive and ready
+    return healthy, {
+        'status': 'ok' if healthy else 'failing',
+        'scheduler': 'running' if alive else 'stalled',
+        'databases': {name: database.describe() for name, database in databases.items()},
+    }
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            status = 200
+            content_type = 'text/plain; version=0.0.4'
+            body = render_metrics().encode()
+        elif self.path in ('/healthz', '/readyz'):
+            healthy, report = probe_status('live' if self.path == '/healthz' else 'ready')
+            status = 200 if healthy else 503
+            content_type = 'application/json'
+            body = json.dumps(report).encode()
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Metrics request: {format % args}")
+
+
+def start_metrics_server(port=METRICS_PORT):
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logging.info(f"Metrics endpoint listening on port {port}.")
+    return server
+
+
+def set_session_options(engine, statements, output_converters=None):
+    def connect(dbapi_connection, connection_record):
+        for sql_type, converter in (output_converters or {}).items():
+            dbapi_connection.add_output_converter(sql_type, converter)
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    event.listen(engine, 'connect', connect)
+
+
+def set_max_statement_length(engine, max_stmt_length):
+    # mysqlclient çoklu INSERT'leri varsayılan olarak 1 MB'lık ifadelere böler, sınır max_allowed_packet'e göre büyütülür
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            cursor.max_stmt_length = max_stmt_length
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def reconnect_delay(attempt):
+    # Jitter, aynı anda kopan servislerin veritabanına aynı anda yüklenmesini önler
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
 
 
 def create_mssql_pool_sqlalchemy(pool_size=5, max_overflow=10, pool_timeout=30):
@@ -30,17 +328,26 @@ def create_mssql_pool_sqlalchemy(pool_size=5, max_overflow=10, pool_timeout=30):
         "driver=ODBC+Driver+18+for+SQL+Server&Encrypt=yes&TrustServerCertificate=yes"
     )
     
+    options = {'isolation_level': MSSQL_ISOLATION_LEVEL} if MSSQL_ISOLATION_LEVEL else {}
+
     try:
+        start = time.perf_counter()
         engine = create_engine(
             connection_string,
             pool_size=pool_size,        
             max_overflow=max_overflow,  
             pool_timeout=pool_timeout,  
             pool_pre_ping=True,         
+            pool_recycle=POOL_RECYCLE,
+            **options,
         )
+        # Satır sayısı mesajları her sorguda ekstra paket demek, kaynakta kapatılır
+        set_session_options(engine, ["SET NOCOUNT ON"], {SQL_SS_TIMESTAMPOFFSET: parse_datetimeoffset})
         
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
+        record_metric('connect_seconds', ('mssql',), time.perf_counter() - start)
+        count_round_trips(engine, 'mssql')
         
         Session = sessionmaker(bind=engine)
         return Session, engine
@@ -52,19 +359,26 @@ def create_mssql_pool_sqlalchemy(pool_size=5, max_overflow=10, pool_timeout=30):
 
 
 
-def create_mysql_pool():
-    logging.info("Creating MySQL Connection Pool with SQLAlchemy...")
+def create_mysql_pool(env_prefix='MYSQL'):
+    logging.info(f"Creating MySQL Connection Pool for {env_prefix}_HOST with SQLAlchemy...")
     
     connection_string = (
-        f"mysql+mysqldb://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}/{os.getenv('MYSQL_DB')}"
+        f"mysql+mysqldb://{os.getenv(f'{env_prefix}_USER')}:{os.getenv(f'{env_prefix}_PASSWORD')}@{os.getenv(f'{env_prefix}_HOST')}/{os.getenv(f'{env_prefix}_DB')}"
     )
     
+    options = {'isolation_level': MYSQL_ISOLATION_LEVEL} if MYSQL_ISOLATION_LEVEL else {}
+
     try:
-        engine = create_engine(connection_string, pool_size=5)
+        start = time.perf_counter()
+        engine = create_engine(connection_string, pool_size=5, pool_pre_ping=True, pool_recycle=POOL_RECYCLE,
+                               **options)
         
         # Bağlantıyı hemen test etmek için engine ile bir test sorgusu çalıştır
         with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+            max_allowed_packet = conn.execute(text("SELECT @@max_allowed_packet")).scalar()
+        record_metric('connect_seconds', ('mysql',), time.perf_counter() - start)
+        count_round_trips(engine, 'mysql')
+        set_max_statement_length(engine, min(MYSQL_MAX_STATEMENT_BYTES, int(max_allowed_packet * 0.9)))
         
         return engine
     
@@ -73,78 +387,218 @@ def create_mysql_pool():
         raise  # Hata fırlat
 
 
-def get_column_data_type_and_identity(cursor_source, source_schema, source_table, column):
+class DatabaseConnector:
+    # Havuz arka planda artan aralıklarla denenerek kurulur, servis bu sırada konfigürasyonu doğrular ve kontrol
+    # uçlarına cevap verir. Sürücü modülü (pyodbc, MySQLdb) de ilk create_engine çağrısında yüklenir
+    def __init__(self, name, create_pool):
+        self.name = name
+        self.create_pool = create_pool
+        self.pool = None
+        self.status = 'connecting'
+        self.error = None
+        self.attempts = 0
+        databases[name] = self
+
+    def start(self):
+        threading.Thread(target=self.connect, name=f"connect-{self.name}", daemon=True).start()
+        return self
+
+    def connect(self):
+        while self.pool is None:
+            try:
+                self.pool = self.create_pool()
+            except Exception as connect_error:
+                delay = reconnect_delay(self.attempts)
+                self.attempts += 1
+                self.status = 'down'
+                self.error = str(connect_error)
+                logging.error(f"Connection to {self.name} failed, trying again in {delay:.0f} seconds: {self.error}")
+                time.sleep(delay)
+
+        self.status = 'up'
+        self.error = None
+        logging.info(f"Connection to {self.name} is successful.")
+
+    def describe(self):
+        return {'status': self.status, 'error': self.error, 'attempts': self.attempts}
+
+
+def get_table_targets(table, sync_config):
+    return table.get('targets', sync_config.get('targets', [DEFAULT_TARGET]))
+
+
+def state_key(target_table, target):
+    # Varsayılan hedefin durum anahtarı tek hedefli kurulumlarla aynı kalır
+    return target_table if target == DEFAULT_TARGET else f"{target}:{target_table}"
+
+
+def get_target_database(target, sync_config):
+    name = 'mysql' if target == DEFAULT_TARGET else f"mysql:{target}"
+    database = databases.get(name)
+    if database is None:
+        env_prefix = get_target_env_prefix(target, sync_config)
+        database = DatabaseConnector(name, lambda: create_mysql_pool(env_prefix)).start()
+    return database
+
+
+def get_target_env_prefix(target, sync_config):
+    return 'MYSQL' if target == DEFAULT_TARGET else sync_config['mysql_targets'][target]
+
+
+class SharedSource:
+    # Bir tablo birden fazla hedefe yazılırken her hedef kendi thread'inde çalışır ama kaynak tek MSSQL bağlantısını
+    # paylaşır. Aynı sorgu (metin ve parametreler) bir kez çalıştırılır, sonucu bekleyen diğer hedefler kopyasını alır.
+    # Sonuç, hâlâ çalışan hedeflerin hepsi aldığında bırakılır. Akış halinde okunan sorgular (yield_per) ve
+    # shared_source=False ile işaretlenen sorgular (ilk yükleme parçaları) paylaşılmaz; her hedef bunları kendi kaynak
+    # bağlantısında kendi hızında okur
+    def __init__(self, session, mssql_pool, participants):
+        self.session = session
+        self.mssql_pool = mssql_pool
+        self.participants = participants
+        self.lock = threading.Lock()
+        self.session_lock = threading.Lock()
+        self.results = {}
+        # thread id -> hedefin paylaşılmayan sorguları için açtığı oturum
+        self.sessions = {}
+        self.closed = set()
+
+    def execute(self, statement, params=None, execution_options=None):
+        execution_options = execution_options or {}
+        if 'yield_per' in execution_options or not execution_options.get('shared_source', True):
+            return self.target_session().execute(statement, params, execution_options=execution_options)
+
+        key = (str(statement), tuple(sorted((name, tuple(value) if isinstance(value, (list, set)) else value)
+                                            for name, value in (params or {}).items())))
+        with self.lock:
+            entry = self.results.get(key)
+            owner = entry is None
+            if owner:
+                entry = self.results[key] = {'ready': threading.Event(), 'users': 0}
+            entry['users'] += 1
+            if entry['users'] >= self.participants:
+                del self.results[key]
+
+        if owner:
+            try:
+                with self.session_lock:
+                    result = self.session.execute(statement, params, execution_options=execution_options)
+                    entry['result'] = result.freeze()
+            except Exception as execute_error:
+                entry['error'] = execute_error
+            finally:
+                entry['ready'].set()
+        else:
+            entry['ready'].wait()
+
+        if 'error' in entry:
+            raise entry['error']
+        return entry['result']()
+
+    def target_session(self):
+        thread_id = threading.get_ident()
+        with self.lock:
+            session = self.sessions.get(thread_id)
+            if session is None:
+                session = self.sessions[thread_id] = self.mssql_pool()
+        return session
+
+    def commit(self):
+        pass
+
+    def close(self):
+        # Hedef işini bitirdi: kendi kaynak bağlantısı kapatılır ve artık beklemediği sonuçlar bırakılır
+        thread_id = threading.get_ident()
+        with self.lock:
+            if thread_id in self.closed:
+                return
+            self.closed.add(thread_id)
+            session = self.sessions.pop(thread_id, None)
+            self.participants -= 1
+            for key in [key for key, entry in self.results.items() if entry['users'] >= self.participants]:
+                del self.results[key]
+        if session is not None:
+            session.close()
+
+
+def align_target_states(table_states):
+    # Hedefler aynı watermark ve değişiklik sürümünden okursa kaynak sorguları paylaşılır. En geride olan hedefe
+    # hizalanır; öndeki hedeflere zaten yazılmış satırlar tekrar okunur ama değişiklik bulunmadan geçilir.
+    # İlk yüklemesi süren hedefin parça sorguları zaten farklı olduğu için hizalamaya katılmaz
+    aligned = {target: dict(table_state) for target, table_state in table_states.items()}
+    loaded = [table_state for table_state in aligned.values() if 'initial_load_key' not in table_state]
+
+    for key in ('watermark', 'change_version'):
+        values = [table_state.get(key) for table_state in loaded]
+        common = None if None in values or not values else min(values, key=decode_watermark)
+        for table_state in loaded:
+            if common is None:
+                table_state.pop(key, None)
+            else:
+                table_state[key] = common
+
+    last_full_sync = min((table_state.get('last_full_sync', 0) for table_state in loaded), default=0)
+    for table_state in loaded:
+        table_state['last_full_sync'] = last_full_sync
+    return aligned
+
+
+def load_table_metadata(cursor_source, source_schema, source_table):
     query = f"""
-    SELECT DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, DATETIME_PRECISION, 
-           COLUMNPROPERTY(object_id('{source_schema}.{source_table}'), '{column}', 'IsIdentity') AS IS_IDENTITY,
+    SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, DATETIME_PRECISION,
+           COLUMNPROPERTY(object_id('{source_schema}.{source_table}'), COLUMN_NAME, 'IsIdentity') AS IS_IDENTITY,
            IDENT_SEED('{source_schema}.{source_table}') AS SEED_VALUE,
            IDENT_INCR('{source_schema}.{source_table}') AS INCREMENT_VALUE
-    FROM INFORMATION_SCHEMA.COLUMNS 
-    WHERE TABLE_SCHEMA = '{source_schema}' AND TABLE_NAME = '{source_table}' AND COLUMN_NAME = '{column}'
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = '{source_schema}' AND TABLE_NAME = '{source_table}'
+    ORDER BY ORDINAL_POSITION
     """
 
-    res = cursor_source.execute(text(query))
-    result = res.fetchall()
-
-    if result[0]:
-        data_type, char_length, numeric_precision, numeric_scale, datetime_precision, is_identity, seed_value, increment_value = result[0]
-
-        # Map MSSQL data types to MySQL equivalents
-        if data_type == 'bigint':
-            column_type = 'BIGINT'
-        elif data_type == 'int':
-            column_type = 'INT'
-        elif data_type == 'smallint':
-            column_type = 'SMALLINT'
-        elif data_type == 'tinyint':
-            column_type = 'TINYINT'
-        elif data_type == 'float':
-            column_type = 'FLOAT'
-        elif data_type in ('decimal', 'numeric'):
-            column_type = f"DECIMAL({numeric_precision},{numeric_scale})"
-        elif data_type in ('nvarchar', 'varchar'):
-            if char_length == -1:  # MSSQL's MAX equivalent
-                column_type = 'TEXT'
-            else:
-                column_type = f"VARCHAR({char_length})"
-        elif data_type == 'char':
-            column_type = f"CHAR({char_length})"
-        elif data_type == 'binary':
-            column_type = 'LONGBLOB'  
-        elif data_type == 'varbinary':
-            column_type = 'LONGBLOB'  
-        elif data_type == 'bit':
-            column_type = 'TINYINT(1)'
-        elif data_type == 'date':
-            column_type = 'DATE'
-        elif data_type == 'datetime2':
-            column_type = 'DATETIME(6)'
-        elif data_type == 'datetime':
-            column_type = 'DATETIME'
-        elif data_type == 'smalldatetime':
-            column_type = 'DATETIME'
-        elif data_type == 'datetimeoffset':
-            column_type = 'VARCHAR(40)'
-        elif data_type == 'image':
-            column_type = 'LONGBLOB'
-        elif data_type == 'money':
-            column_type = 'DECIMAL(19,4)'
-        elif data_type == 'real':
-            column_type = 'FLOAT'
-        elif data_type == 'smallmoney':
-            column_type = 'DECIMAL(10,4)'
-        elif data_type == 'time':
-            column_type = 'TIME(6)'
-        elif data_type == 'text':
-            column_type = 'LONGTEXT'
-        elif data_type == 'ntext':
-            column_type = 'LONGTEXT'
-        elif data_type == 'xml':
+    result = cursor_source.execute(text(query))
+    return {row[0]: tuple(row[1:]) for row in result}
+
+
+def fetch_table_modify_date(cursor_source, source_schema, source_table):
+    query = f"SELECT modify_date FROM sys.objects WHERE object_id = OBJECT_ID('{source_schema}.{source_table}')"
+    return cursor_source.execute(text(query)).scalar()
+
+
+@track_phase('metadata')
+def get_table_metadata(cursor_source, source_schema, source_table):
+    key = (source_schema, source_table)
+    cached = schema_cache.get(key)
+    now = time.time()
+
+    if cached and now - cached['checked_at'] < SCHEMA_CACHE_TTL:
+        return cached['columns']
+
+    # TTL dolduysa tabloyu yeniden okumadan önce sys.objects üzerinden şema değişikliğini kontrol et
+    modify_date = fetch_table_modify_date(cursor_source, source_schema, source_table)
+    if cached and cached['modify_date'] == modify_date:
+        cached['checked_at'] = now
+        return cached['columns']
+
+    logging.debug(f"Loading column metadata for {source_schema}.{source_table}.")
+    columns = load_table_metadata(cursor_source, source_schema, source_table)
+    schema_cache[key] = {'columns': columns, 'modify_date': modify_date, 'checked_at': now}
+    return columns
+
+
+def get_column_data_type_and_identity(cursor_source, source_schema, source_table, column):
+    metadata = get_table_metadata(cursor_source, source_schema, source_table)
+
+    # MSSQL kolon adları büyük/küçük harf duyarsızdır
+    result = metadata.get(column)
+    if result is None:
+        result = next((value for name, value in metadata.items() if name.lower() == column.lower()), None)
+
+    if result:
+        data_type, char_length, numeric_precision, numeric_scale, datetime_precision, is_identity, seed_value, increment_value = result
+
+        column_type = get_type_mapping(data_type)[0]
+        if char_length == -1 and '{length}' in column_type:  # MSSQL's MAX equivalent
             column_type = 'TEXT'
-        elif data_type == 'uniqueidentifier':
-            column_type = 'CHAR(36)'
         else:
-            raise Exception(f"Unknown data type: {data_type}. Unable to map to MySQL.")
+            column_type = column_type.format(length=char_length, precision=numeric_precision, scale=numeric_scale)
 
         if is_identity and seed_value == 1:
             return f"{column_type} AUTO_INCREMENT", 'PRIMARY KEY', seed_value, increment_value
@@ -154,14 +608,156 @@ def get_column_data_type_and_identity(cursor_source, source_schema, source_table
         raise Exception(f"Failed to find column type for {column} in table {source_schema}.{source_table}.")
 
 
+def validate_sync_config(sync_config):
+    # Bağlanmadan yapılabilen kontroller; hataların hepsi tek seferde raporlanır
+    errors = []
+
+    def check_options(options, where):
+        for option in POSITIVE_OPTIONS:
+            value = options.get(option)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                errors.append(f"{where}: {option} must be a positive number")
+        max_deletes = options.get('max_deletes')
+        if max_deletes is not None and (isinstance(max_deletes, bool) or not isinstance(max_deletes, int) or
+                                        max_deletes < 0):
+            errors.append(f"{where}: max_deletes must be a non-negative integer")
+        watermark_margin = options.get('watermark_margin')
+        if watermark_margin is not None and (isinstance(watermark_margin, bool) or
+                                             not isinstance(watermark_margin, (int, float)) or watermark_margin < 0):
+            errors.append(f"{where}: watermark_margin must be a non-negative number")
+        if options.get('compare_mode', 'rows') not in COMPARE_MODES:
+            errors.append(f"{where}: compare_mode must be one of {', '.join(COMPARE_MODES)}")
+
+    if not isinstance(sync_config.get('tables'), list) or not sync_config['tables']:
+        raise Exception("Invalid configuration: tables must be a non-empty list")
+    check_options(sync_config, 'top level')
+
+    mysql_targets = sync_config.get('mysql_targets', {})
+    if not isinstance(mysql_targets, dict) or DEFAULT_TARGET in mysql_targets or \
+            not all(isinstance(prefix, str) and prefix for prefix in mysql_targets.values()):
+        errors.append(f"top level: mysql_targets must map target names other than {DEFAULT_TARGET} to env prefixes")
+        mysql_targets = {}
+
+    configured_types = sync_config.get('type_mappings', {})
+    if not isinstance(configured_types, dict) or \
+            not all(isinstance(column_type, str) and column_type for column_type in configured_types.values()):
+        errors.append("top level: type_mappings must map MSSQL type names to MySQL column types")
+    else:
+        for data_type, column_type in configured_types.items():
+            try:
+                column_type.format(length=1, precision=1, scale=0)
+            except (IndexError, KeyError, ValueError):
+                errors.append(f"top level: type_mappings.{data_type} may only use {{length}}, {{precision}} and "
+                              f"{{scale}} placeholders")
+
+    def check_targets(options, where):
+        if 'targets' not in options:
+            return
+        targets = options['targets']
+        if not isinstance(targets, list) or not targets or len(set(map(str, targets))) != len(targets):
+            errors.append(f"{where}: targets must be a non-empty list of distinct target names")
+            return
+        for target in targets:
+            if target != DEFAULT_TARGET and target not in mysql_targets:
+                errors.append(f"{where}: target {target} is not defined in mysql_targets")
+
+    check_targets(sync_config, 'top level')
+
+    tables = {}
+    for index, table in enumerate(sync_config['tables']):
+        try:
+            name = resolve_target_table(table)
+        except Exception as target_error:
+            name = None
+            errors.append(f"tables[{index}]: {str(target_error)}")
+        where = f"table {name}" if name else f"tables[{index}]"
+
+        if name in tables:
+            errors.append(f"{where}: configured more than once")
+        elif name is not None:
+            tables[name] = table
+        if 'id_column' not in table:
+            errors.append(f"{where}: id_column is required")
+        if not table.get('query') and not (table.get('source_schema') and table.get('source_table')):
+            errors.append(f"{where}: source_schema and source_table are required without a query")
+        if table.get('column_as_is', 0) != 1 and 'columns' not in table:
+            errors.append(f"{where}: columns must be specified because column_as_is = 0")
+        if table.get('change_source') not in (None,) + CHANGE_SOURCES:
+            errors.append(f"{where}: change_source must be one of {', '.join(CHANGE_SOURCES)}")
+        check_options(table, where)
+        check_targets(table, where)
+
+    try:
+        get_table_dependencies(tables)
+    except Exception as dependency_error:
+        errors.append(str(dependency_error))
+
+    if errors:
+        raise Exception(f"Invalid configuration: {'; '.join(errors)}")
+
+
 def load_sync_config(json_file):
     with open(json_file, 'r') as file:
         return json.load(file)
 
 
-def create_target_table(cursor_target, target_table, columns, cursor_source, source_schema, source_table, column_as_is, target_id):
-    logging.info(f"Creating target table: {target_table}...")
+def load_sync_state(state_file=SYNC_STATE_FILE):
+    if not os.path.exists(state_file):
+        return {}
+
+    with open(state_file, 'r') as file:
+        return json.load(file)
+
 
+def save_sync_state(sync_state, state_file=SYNC_STATE_FILE):
+    # Yarım yazılmış bir durum dosyası kalmaması için önce geçici dosyaya yaz
+    temp_file = f"{state_file}.tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(sync_state, file, indent=2)
+    os.replace(temp_file, state_file)
+
+
+def update_sync_state(name, values, state_file=SYNC_STATE_FILE):
+    # Tablolar paralel çalıştığı için dosya her güncellemede kilit altında yeniden okunup yazılır
+    with sync_state_lock:
+        sync_state = load_sync_state(state_file)
+        table_state = sync_state.get(name, {})
+        table_state.update(values)
+        table_state = {key: value for key, value in table_state.items() if value is not None}
+        if table_state:
+            sync_state[name] = table_state
+        else:
+            sync_state.pop(name, None)
+        save_sync_state(sync_state, state_file)
+
+
+def encode_watermark(value):
+    if isinstance(value, bytes):
+        return {'bytes': value.hex()}
+    if isinstance(value, datetime.datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'date': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'decimal': str(value)}
+    return value
+
+
+def decode_watermark(value):
+    if not isinstance(value, dict):
+        return value
+    if 'bytes' in value:
+        return bytes.fromhex(value['bytes'])
+    if 'datetime' in value:
+        return datetime.datetime.fromisoformat(value['datetime'])
+    if 'date' in value:
+        return datetime.date.fromisoformat(value['date'])
+    if 'decimal' in value:
+        return decimal.Decimal(value['decimal'])
+    raise Exception(f"Unknown watermark value in sync state: {value}")
+
+
+def build_target_table_ddl(target_table, columns, cursor_source, source_schema, source_table, column_as_is, target_id):
     columns_definitions = []
     primary_key_column = None
     auto_increment_column = None
@@ -197,16 +793,24 @@ def create_target_table(cursor_target, target_table, columns, cursor_source, sou
         create_query += f", PRIMARY KEY ({primary_key_column})"
 
     create_query += ")"
-
-    logging.info(f"Table creation query: {create_query}")
-    cursor_target.execute(create_query)
+    statements = [create_query]
 
     if auto_increment_column:
-        alter_query = f"ALTER TABLE {target_table} AUTO_INCREMENT = {seed_value}"
-        logging.info(f"Setting AUTO_INCREMENT seed: {alter_query}")
-        cursor_target.execute(alter_query)
+        statements.append(f"ALTER TABLE {target_table} AUTO_INCREMENT = {seed_value}")
 
+    return statements
 
+
+def create_target_table(cursor_target, target_table, columns, cursor_source, source_schema, source_table, column_as_is, target_id):
+    logging.info(f"Creating target table: {target_table}...")
+
+    for statement in build_target_table_ddl(target_table, columns, cursor_source, source_schema, source_table,
+                                            column_as_is, target_id):
+        logging.info(f"Table creation query: {statement}")
+        cursor_target.execute(text(statement))
+
+
+@track_phase('metadata')
 def filter_comparable_columns(cursor_source, source_schema, source_table, columns):
     comparable_columns = {}
 
@@ -219,96 +823,1240 @@ def filter_comparable_columns(cursor_source, source_schema, source_table, column
     return comparable_columns
 
 
-def sync_data(session_mssql, cursor_target, source_schema, source_table, target_table, columns, id_column, table_as_is,
-              column_as_is, target_id=None, conditions=None, query=None):
-    logging.debug(f"Starting data synchronization between {source_schema}.{source_table} and {target_table}.")
+def same_value(source_value, target_value):
+    return source_value == target_value
+
+
+def same_second(source_value, target_value):
+    # Tarih karşılaştırmasını yalnızca Yıl-Ay-Gün Saat:Dakika:Saniye ile yapıyoruz, mikrosaniyeleri atlıyoruz
+    if isinstance(source_value, datetime.datetime) and isinstance(target_value, datetime.datetime):
+        return source_value.replace(microsecond=0) == target_value.replace(microsecond=0)
+    return source_value == target_value
+
+
+def same_audit_date(source_value, target_value):
+    # Audit date columns are only compared when both sides hold a datetime
+    if isinstance(source_value, datetime.datetime) and isinstance(target_value, datetime.datetime):
+        return source_value.replace(microsecond=0) == target_value.replace(microsecond=0)
+    return True
+
+
+def float_digits(value):
+    # Hash karşılaştırmasıyla aynı kural: hedefteki tek duyarlıklı FLOAT'a indirilip FLOAT_DIGITS anlamlı haneye
+    # yuvarlanır, bkz. mssql_hash_column
+    return f"{array('f', [value])[0]:.{FLOAT_DIGITS}g}"
+
+
+def same_float(source_value, target_value):
+    if source_value == target_value:
+        return True
+    if isinstance(source_value, float) and isinstance(target_value, float):
+        return float_digits(source_value) == float_digits(target_value)
+    return False
+
+
+def same_datetimeoffset(source_value, target_value):
+    if source_value is None or target_value is None:
+        return source_value is target_value
+    return format_datetimeoffset(source_value) == target_value
+
+
+def same_uuid(source_value, target_value):
+    if source_value is None or target_value is None:
+        return source_value is target_value
+    return format_uuid(source_value) == target_value.upper()
+
+
+def truncate_microseconds(value):
+    return value.replace(microsecond=0)
+
+
+def format_datetimeoffset(value):
+    # MSSQL'in CONVERT(NVARCHAR, ...) biçimi; datetime 100 ns hanesini tutamadığı için kesir 6 hanedir
+    if not isinstance(value, datetime.datetime) or value.tzinfo is None:
+        return str(value)
+    minutes = int(value.utcoffset().total_seconds()) // 60
+    sign = '-' if minutes < 0 else '+'
+    return f"{value:%Y-%m-%d %H:%M:%S.%f} {sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def parse_datetimeoffset(value):
+    # SQL_SS_TIMESTAMPOFFSET_STRUCT: yıl, ay, gün, saat, dakika, saniye, nanosaniye, saat ve dakika farkı
+    if value is None:
+        return None
+    year, month, day, hour, minute, second, nanoseconds, offset_hours, offset_minutes = \
+        struct.unpack('<6hI2h', value)
+    offset = datetime.timezone(datetime.timedelta(hours=offset_hours, minutes=offset_minutes))
+    return datetime.datetime(year, month, day, hour, minute, second, nanoseconds // 1000, offset)
+
+
+def format_uuid(value):
+    # pyodbc uniqueidentifier değerlerini büyük harfli metin olarak döner, native_uuid açıksa uuid.UUID gelir
+    return str(value).upper()
+
+
+# MSSQL tipi -> (MySQL kolon tipi, hedefe yazmadan önce uygulanacak dönüşüm, kaynak ve hedef değer karşılaştırması).
+# Kolon tipindeki {length}, {precision} ve {scale} kaynak kolondan doldurulur, {length} içeren tipler MAX için TEXT
+# olur. conf.json'daki type_mappings ile genişletilir, bkz. configure_type_mappings
+TYPE_MAPPINGS = {
+    'bigint': ('BIGINT', None, same_value),
+    'int': ('INT', None, same_value),
+    'smallint': ('SMALLINT', None, same_value),
+    'tinyint': ('TINYINT', None, same_value),
+    'float': ('FLOAT', None, same_float),
+    'real': ('FLOAT', None, same_float),
+    'decimal': ('DECIMAL({precision},{scale})', None, same_value),
+    'numeric': ('DECIMAL({precision},{scale})', None, same_value),
+    'money': ('DECIMAL(19,4)', None, same_value),
+    'smallmoney': ('DECIMAL(10,4)', None, same_value),
+    'bit': ('TINYINT(1)', int, same_value),
+    'nvarchar': ('VARCHAR({length})', None, same_value),
+    'varchar': ('VARCHAR({length})', None, same_value),
+    'char': ('CHAR({length})', None, same_value),
+    'text': ('LONGTEXT', None, same_value),
+    'ntext': ('LONGTEXT', None, same_value),
+    'xml': ('TEXT', None, same_value),
+    'binary': ('LONGBLOB', None, same_value),
+    'varbinary': ('LONGBLOB', None, same_value),
+    'image': ('LONGBLOB', None, same_value),
+    'date': ('DATE', None, same_value),
+    'datetime2': ('DATETIME(6)', None, same_value),
+    # MySQL DATETIME saniye hassasiyetindedir, milisaniyeler yazılmaz ve karşılaştırılmaz
+    'datetime': ('DATETIME', truncate_microseconds, same_second),
+    'smalldatetime': ('DATETIME', truncate_microseconds, same_second),
+    'time': ('TIME(6)', None, same_value),
+    'datetimeoffset': ('VARCHAR(40)', format_datetimeoffset, same_datetimeoffset),
+    'uniqueidentifier': ('CHAR(36)', format_uuid, same_uuid),
+}
+type_mappings = dict(TYPE_MAPPINGS)
+
 
-    # Eğer 'query' varsa, sorguyu çalıştır ve sonuçları doğrudan aktar
-    if query:
-        logging.debug(f"Executing custom query: {query}")
-        result = session_mssql.execute(text(query))
-        source_data = result.fetchall()
+def get_type_mapping(data_type):
+    mapping = type_mappings.get(data_type)
+    if mapping is None:
+        raise Exception(f"Unknown data type: {data_type}. Unable to map to MySQL, add it to type_mappings.")
+    return mapping
+
+
+def configure_type_mappings(sync_config):
+    global type_mappings
+
+    # Yerleşik bir tipin sadece MySQL kolon tipi değişir, dönüşüm ve karşılaştırması korunur. Yeni tipler olduğu gibi
+    # yazılır ve birebir karşılaştırılır
+    mappings = dict(TYPE_MAPPINGS)
+    for data_type, column_type in sync_config.get('type_mappings', {}).items():
+        _, convert, same = TYPE_MAPPINGS.get(data_type.lower(), (None, None, same_value))
+        mappings[data_type.lower()] = (column_type, convert, same)
+
+    if mappings != type_mappings:
+        type_mappings = mappings
+        # Önceki eşleştirmeyle derlenmiş kolon dönüşümleri bırakılır
+        for entry in list(schema_cache.values()):
+            entry.pop('compiled', None)
+
+
+def compile_table_types(cursor_source, source_schema, source_table, source_columns):
+    # Kolon başına dönüşüm ve karşılaştırma tablo başına bir kez derlenir. Derleme şema önbelleği kaydında tutulur,
+    # şema değiştiğinde kayıt yenilendiği için yeniden derlenir
+    get_table_metadata(cursor_source, source_schema, source_table)
+    compiled = schema_cache[(source_schema, source_table)].setdefault('compiled', {})
+    key = tuple(source_columns)
+
+    if key not in compiled:
+        converters = []
+        comparators = [same_value]  # id kolonu
+        for index, col in enumerate(source_columns):
+            data_type = get_source_data_type(cursor_source, source_schema, source_table, col)
+            _, convert, same = get_type_mapping(data_type)
+            converters.append(convert)
+            if index:
+                comparators.append(same_audit_date if col in AUDIT_DATE_COLUMNS else same)
+        compiled[key] = (tuple(converters), tuple(comparators))
+
+    return compiled[key]
+
+
+def get_conversions(converters):
+    return [(i, convert) for i, convert in enumerate(converters or ()) if convert is not None]
+
+
+def convert_row(row, conversions):
+    values = list(row)
+    for i, convert in conversions:
+        if values[i] is not None:
+            values[i] = convert(values[i])
+    return values
+
+
+def bind_rows(rows, params, converters=None):
+    conversions = get_conversions(converters)
+    if not conversions:
+        return [dict(zip(params, row)) for row in rows]
+    return [dict(zip(params, convert_row(row, conversions))) for row in rows]
+
+
+def get_statement(key, build):
+    statement = statement_cache.get(key)
+    if statement is None:
+        statement = statement_cache.setdefault(key, build())
+    return statement
+
+
+def column_params(target_columns):
+    return [f"c{i}" for i in range(len(target_columns))]
+
+
+def build_write_statements(target_table, target_columns, target_id, upsert):
+    params = column_params(target_columns)
+    columns_list = ', '.join(target_columns)
+    values_list = ', '.join(f":{param}" for param in params)
+
+    if upsert:
+        # Inserts and updates share one multi-row INSERT ... ON DUPLICATE KEY UPDATE (target_id must be a unique key)
+        assignments = ', '.join(f"{col} = VALUES({col})" for col in target_columns if col != target_id)
+        return (text(f"INSERT INTO {target_table} ({columns_list}) VALUES ({values_list}) "
+                     f"ON DUPLICATE KEY UPDATE {assignments}"), None)
+
+    assignments = ', '.join(f"{col} = :{param}" for col, param in zip(target_columns, params) if col != target_id)
+    return (text(f"INSERT INTO {target_table} ({columns_list}) VALUES ({values_list})"),
+            text(f"UPDATE {target_table} SET {assignments} WHERE {target_id} = :c0"))
+
+
+def build_key_statement(statement):
+    return text(statement).bindparams(bindparam('ids', expanding=True))
+
+
+def batched(rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
 
-        # İlk olarak hedef tabloda var olan kayıtları çek
-        logging.debug(f"Fetching data from {target_table}.")
-        target_query = f"SELECT {target_id} FROM {target_table}"
-        result_target = cursor_target.execute(text(target_query))
-        target_data = result_target.fetchall()
-        target_ids = set([row[0] for row in target_data])
 
-        # source_data'dan gelen ID'leri al
-        source_ids = set([row[0] for row in source_data])
+@track_phase('target_read')
+def fetch_target_rows(cursor_target, target_table, target_columns, target_id, ids=None, chunk_size=BATCH_SIZE):
+    logging.debug(f"Fetching data from {target_table}.")
+
+    if ids is None:
+        target_query = f"SELECT {', '.join(target_columns)} FROM {target_table} ORDER BY {target_id}"
+        result = cursor_target.execute(text(target_query))
+        return {row[0]: row for row in result}
+
+    # Sadece değişen kayıtların hedefteki karşılıklarını çek
+    columns_list = ', '.join(target_columns)
+    target_query = get_statement(('select_target', target_table, columns_list, target_id), lambda: build_key_statement(
+        f"SELECT {columns_list} FROM {target_table} WHERE {target_id} IN :ids"))
+    target_rows = {}
+    for chunk in batched(list(ids), chunk_size):
+        result = cursor_target.execute(target_query, {'ids': chunk})
+        target_rows.update((row[0], row) for row in result)
+    return target_rows
+
+
+def fetch_min_active_rowversion(session_mssql):
+    # Açık transaction'ların alabileceği en küçük rowversion; bunun altındaki değerlerin hepsi commit edilmiştir
+    return session_mssql.execute(text("SELECT MIN_ACTIVE_ROWVERSION()")).scalar()
+
+
+def fetch_rowversion_bound(session_mssql, table, table_state):
+    # Sınır kaynak transaction'ının ilk sorgusunda alınır; snapshot izolasyonunda daha sonra commit edilen satırlar
+    # bu turda görünmez ve sınırın altında kalmamalıdır
+    watermark_column = table.get('watermark_column')
+    if not watermark_column:
+        return None
+    if table.get('query'):
+        # Sorgu kolonunun tipi bilinmez, kayıtlı watermark'ın tipine bakılır
+        watermark = table_state.get('watermark')
+        rowversion = isinstance(watermark, dict) and 'bytes' in watermark
+    else:
+        metadata = get_table_metadata(session_mssql, table.get('source_schema'), table.get('source_table'))
+        data_type = next((values[0] for name, values in metadata.items()
+                          if name.lower() == watermark_column.lower()), None)
+        rowversion = data_type in ROWVERSION_TYPES
+        if rowversion:
+            # Şema önbelleği boşsa ya da süresi dolduysa metadata sorgusu transaction'ı başlatmıştır
+            session_mssql.commit()
+    return fetch_min_active_rowversion(session_mssql) if rowversion else None
+
+
+@track_phase('source_read')
+def fetch_watermark(session_mssql, source, watermark_column, conditions=None, margin=WATERMARK_MARGIN,
+                    min_active_rowversion=None):
+    watermark_query = f"SELECT MAX({watermark_column}) FROM {source}"
+    if conditions:
+        watermark_query += f" WHERE {conditions}"
+
+    watermark = session_mssql.execute(text(watermark_query)).scalar()
+    # MAX, açık transaction'ların daha küçük değerle yazdığı satırları görmez; bunlar commit edildiğinde watermark'ın
+    # altında kalıp atlanmasın diye üst sınır geri çekilir
+    if isinstance(watermark, bytes):
+        if min_active_rowversion is None:
+            min_active_rowversion = fetch_min_active_rowversion(session_mssql)
+        committed = (int.from_bytes(min_active_rowversion, 'big') - 1).to_bytes(len(min_active_rowversion), 'big')
+        watermark = min(watermark, committed)
+    elif isinstance(watermark, datetime.datetime):
+        watermark -= datetime.timedelta(seconds=margin)
+    return watermark
+
+
+@track_phase('diff')
+def diff_rows(source_data, target_rows, comparators):
+    rows_to_insert = []
+    rows_to_update = []
+
+    for row in source_data:
+        target_row = target_rows.get(row[0])
+
+        if target_row is None:
+            rows_to_insert.append(row)
+            continue
+
+        # Satırların çoğu değişmez; tüm satır tek seferde C'de karşılaştırılır, kolon kuralları sadece farklı olanlara uygulanır
+        if tuple(row) == tuple(target_row):
+            continue
+
+        for i, same in enumerate(comparators):
+            if not same(row[i], target_row[i]):
+                rows_to_update.append(row)
+                break
+
+    return rows_to_insert, rows_to_update
+
+
+def write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update, batch_size,
+               upsert=False, converters=None):
+    params = column_params(target_columns)
+    insert_statement, update_statement = get_statement(
+        ('write', target_table, tuple(target_columns), target_id, upsert),
+        lambda: build_write_statements(target_table, target_columns, target_id, upsert))
+
+    if upsert:
+        statements = [('upsert', insert_statement, rows_to_insert + rows_to_update)]
+    else:
+        statements = [('insert', insert_statement, rows_to_insert), ('update', update_statement, rows_to_update)]
+
+    for phase, statement, rows in statements:
+        if not rows:
+            continue
+        with track_phase(phase):
+            for batch in batched(rows, batch_size):
+                bound_rows = bind_rows(batch, params, converters)
+                # Tam ifade ve değer loglaması maliyetli olduğu için sadece LOG_STATEMENTS=1 ile açılır
+                if LOG_STATEMENTS:
+                    logging.info(f"{phase.capitalize()} statement: {statement} with {bound_rows}")
+                cursor_target.execute(statement, bound_rows)
+
+
+@track_phase('delete')
+def delete_rows(cursor_target, target_table, target_id, ids_to_delete, chunk_size):
+    delete_query = get_statement(('delete', target_table, target_id), lambda: build_key_statement(
+        f"DELETE FROM {target_table} WHERE {target_id} IN :ids"))
+    ids_to_delete = sorted(ids_to_delete)
+
+    for chunk in batched(ids_to_delete, chunk_size):
+        if LOG_STATEMENTS:
+            logging.info(f"Delete statement: {delete_query} with {chunk}")
+        cursor_target.execute(delete_query, {'ids': chunk})
+
+
+def check_delete_limit(target_table, ids_to_delete, source_count, target_count, max_deletes):
+    # Kaynak sorgu geçici bir hata yüzünden boş dönerse hedef tablonun tamamen silinmesini engelle
+    if source_count == 0 and target_count > 0:
+        logging.error(f"Source returned no rows for {target_table}, skipping delete of {len(ids_to_delete)} rows.")
+        return False
+
+    if max_deletes is not None and len(ids_to_delete) > max_deletes:
+        logging.error(f"{len(ids_to_delete)} rows to delete from {target_table} exceeds max_deletes = {max_deletes}, "
+                      f"skipping deletes.")
+        return False
+
+    return True
+
+
+def reconcile_rows(cursor_target, target_table, target_columns, target_id, source_data, comparators, batch_size,
+                   upsert=False, delete_chunk_size=DELETE_CHUNK_SIZE, max_deletes=MAX_DELETES, incremental=False,
+                   converters=None, deleted_ids=None, snapshot=None):
+    if snapshot is not None:
+        return reconcile_rows_with_snapshot(cursor_target, target_table, target_columns, target_id, source_data,
+                                            snapshot, batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                                            max_deletes=max_deletes, incremental=incremental, converters=converters,
+                                            deleted_ids=deleted_ids)
+
+    source_ids = set([row[0] for row in source_data])
+
+    if incremental:
+        # Artımlı modda sadece değişen kayıtlar gelir, silmeler periyodik tam senkronizasyonda ya da değişiklik
+        # akışından (deleted_ids) gelir
+        deleted_ids = set(deleted_ids or ())
+        target_rows = fetch_target_rows(cursor_target, target_table, target_columns, target_id,
+                                        ids=source_ids | deleted_ids, chunk_size=batch_size)
+        ids_to_delete = target_rows.keys() & deleted_ids
+
+        # Artımlı turda boş kaynak normaldir (sadece silme gelmiş olabilir), sadece max_deletes uygulanır
+        if not check_delete_limit(target_table, ids_to_delete, None, None, max_deletes):
+            ids_to_delete = set()
+    else:
+        target_rows = fetch_target_rows(cursor_target, target_table, target_columns, target_id)
 
         # Silinecek ID'leri belirle (source'da olmayanlar, target'dan silinir)
-        ids_to_delete = target_ids - source_ids
-        logging.debug(f"IDs to delete: {ids_to_delete}")
-
-        for delete_id in ids_to_delete:
-            delete_query = f"DELETE FROM {target_table} WHERE {target_id} = {delete_id}"
-            logging.info(f"Executing delete query: {delete_query}")
-            cursor_target.execute(text(delete_query))
-
-        for row in source_data:
-            id_value = row[0]
-            # Tüm sütunları sorguya dahil edin, yalnızca id değil
-            check_query = f"SELECT {', '.join(columns.values())} FROM {target_table} WHERE {target_id} = {id_value}"
-            logging.debug(f"Check query: {check_query}")
-            result = cursor_target.execute(text(check_query))
-            target_row = result.fetchone()
-
-            if target_row is None:
-                # Eğer target_row boşsa yeni kayıt ekleme işlemi yapılmalı
-                columns_list = ', '.join(columns.values())
-                values_list = ', '.join(
-                    [f"'{str(item)}'" if isinstance(item,
-                                                    (str, datetime.datetime, datetime.date, datetime.time)) else str(
-                        item)
-                     for item in row]
-                )
-
-                insert_query = f"INSERT INTO {target_table} ({columns_list}) VALUES ({values_list})"
-                logging.info(f"Insert query: {insert_query}")
-                cursor_target.execute(text(insert_query))
-                continue
+        ids_to_delete = target_rows.keys() - source_ids
+        logging.debug(f"IDs to delete: {len(ids_to_delete)}")
 
-            # Güncelleme işlemi için kontrol edilecek kısım
-            needs_update = False
-            update_data = []
+        if not check_delete_limit(target_table, ids_to_delete, len(source_ids), len(target_rows), max_deletes):
+            ids_to_delete = set()
 
-            for i, col in enumerate(columns.keys()):
-                value = row[i]
-                column_name = columns[col]
+    delete_rows(cursor_target, target_table, target_id, ids_to_delete, delete_chunk_size)
 
-                # Hedef satırda ilgili sütunun değerinin var olup olmadığını kontrol et
-                if len(target_row) <= i:
-                    logging.error(f"Target row does not have enough columns to compare for index {i}")
-                    continue
+    rows_to_insert, rows_to_update = diff_rows(source_data, target_rows, comparators)
+    write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update, batch_size,
+               upsert=upsert, converters=converters)
+
+    logging.info(f"{target_table}: {len(rows_to_insert):,} inserted, {len(rows_to_update):,} updated, "
+                 f"{len(ids_to_delete):,} deleted.")
+    return {'inserted': len(rows_to_insert), 'updated': len(rows_to_update), 'deleted': len(ids_to_delete),
+            'source_rows': None if incremental else len(source_ids)}
+
+
+def ordered_rows(rows, side):
+    # Merge join iki tarafın da anahtar sırasının Python sıralamasıyla aynı olmasına dayanır
+    previous_key = None
+    for row in rows:
+        if previous_key is not None and not previous_key < row[0]:
+            raise Exception(f"{side} rows are not in strictly ascending key order ({previous_key!r} before "
+                            f"{row[0]!r}). Disable streaming for tables whose key collation differs between databases.")
+        previous_key = row[0]
+        yield row
+
+
+def iter_target_rows(cursor_target, target_table, target_columns, target_id, fetch_size):
+    logging.debug(f"Streaming data from {target_table}.")
+    target_query = f"SELECT {', '.join(target_columns)} FROM {target_table} ORDER BY {target_id}"
+
+    # Yazmalar cursor_target üzerinden yapıldığı için okuma ayrı bir bağlantıda, sunucu taraflı cursor ile yapılır
+    with cursor_target.engine.connect() as conn_read:
+        result = conn_read.execution_options(stream_results=True, yield_per=fetch_size).execute(text(target_query))
+        yield from result
+
+
+def merge_rows(source_rows, target_rows, comparators):
+    source_row = next(source_rows, None)
+    target_row = next(target_rows, None)
+
+    while source_row is not None or target_row is not None:
+        if target_row is None or (source_row is not None and source_row[0] < target_row[0]):
+            yield 'insert', source_row
+            source_row = next(source_rows, None)
+        elif source_row is None or target_row[0] < source_row[0]:
+            yield 'delete', target_row[0]
+            target_row = next(target_rows, None)
+        else:
+            # diff_rows'daki gibi kolon kuralları sadece tam eşit olmayan satırlara uygulanır
+            if tuple(source_row) != tuple(target_row):
+                for i, same in enumerate(comparators):
+                    if not same(source_row[i], target_row[i]):
+                        yield 'update', source_row
+                        break
+            source_row = next(source_rows, None)
+            target_row = next(target_rows, None)
+
+
+def reconcile_rows_streaming(cursor_target, target_table, target_columns, target_id, source_rows, comparators,
+                             batch_size, fetch_size=FETCH_SIZE, upsert=False, delete_chunk_size=DELETE_CHUNK_SIZE,
+                             max_deletes=MAX_DELETES, converters=None, snapshot=None):
+    if snapshot is not None:
+        return reconcile_rows_with_snapshot(cursor_target, target_table, target_columns, target_id, source_rows,
+                                            snapshot, batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                                            max_deletes=max_deletes, converters=converters)
+
+    counts = {'insert': 0, 'update': 0, 'delete': 0, 'source': 0, 'target': 0}
+
+    def count(rows, key):
+        for row in rows:
+            counts[key] += 1
+            yield row
+
+    source_rows = ordered_rows(count(timed_rows(source_rows, 'source_read'), 'source'), 'Source')
+    target_rows = ordered_rows(count(timed_rows(iter_target_rows(cursor_target, target_table, target_columns,
+                                                                 target_id, fetch_size), 'target_read'),
+                                     'target'), 'Target')
+
+    rows_to_insert = []
+    rows_to_update = []
+    ids_to_delete = []
+    delete_limit_exceeded = False
+
+    try:
+        for action, value in merge_rows(source_rows, target_rows, comparators):
+            counts[action] += 1
 
-                # Karşılaştırma işlemleri
-                if isinstance(value, str):
-                    if value != target_row[i]:
-                        needs_update = True
-                        update_data.append(f"{column_name} = '{value}'")
-                elif isinstance(value, datetime.datetime):
-                    # Tarih karşılaştırmasını yalnızca Yıl-Ay-Gün Saat:Dakika:Saniye ile yapıyoruz, mikrosaniyeleri atlıyoruz
-                    source_value_str = value.strftime('%Y-%m-%d %H:%M:%S')
-                    target_value_str = target_row[i].strftime('%Y-%m-%d %H:%M:%S')
-                    if source_value_str != target_value_str:
-                        needs_update = True
-                        update_data.append(f"{column_name} = '{source_value_str}'")
+            if action == 'delete':
+                # Limit aşıldıysa silinecek id'leri biriktirmeye gerek yok
+                if max_deletes is not None and len(ids_to_delete) >= max_deletes:
+                    delete_limit_exceeded = True
                 else:
-                    if value != target_row[i]:
-                        needs_update = True
-                        update_data.append(f"{column_name} = {value}")
+                    ids_to_delete.append(value)
+                continue
 
-            # needs_update true ise update yap
-            if needs_update:
-                update_query = f"UPDATE {target_table} SET {', '.join(update_data)} WHERE {target_id} = {id_value}"
-                logging.info(f"Update query: {update_query}")
-                cursor_target.execute(text(update_query))
+            (rows_to_insert if action == 'insert' else rows_to_update).append(value)
+            if len(rows_to_insert) + len(rows_to_update) >= batch_size:
+                write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update,
+                           batch_size, upsert=upsert, converters=converters)
+                rows_to_insert = []
+                rows_to_update = []
+    finally:
+        target_rows.close()
+
+    write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update, batch_size,
+               upsert=upsert, converters=converters)
+
+    deleted = 0
+    if not delete_limit_exceeded and check_delete_limit(target_table, ids_to_delete, counts['source'],
+                                                        counts['target'], max_deletes):
+        delete_rows(cursor_target, target_table, target_id, ids_to_delete, delete_chunk_size)
+        deleted = len(ids_to_delete)
+    elif delete_limit_exceeded:
+        logging.error(f"{counts['delete']} rows to delete from {target_table} exceeds max_deletes = {max_deletes}, "
+                      f"skipping deletes.")
+
+    logging.info(f"{target_table}: {counts['insert']:,} inserted, {counts['update']:,} updated, {deleted:,} deleted.")
+    return {'inserted': counts['insert'], 'updated': counts['update'], 'deleted': deleted,
+            'source_rows': counts['source']}
+
+
+def row_digest(row, conversions=None):
+    # Özet hedefe yazılan (dönüştürülmüş) değerlerden alınır, dönüşüm değişirse satırlar bir kez yeniden yazılır
+    if conversions:
+        row = convert_row(row, conversions)
+    return hashlib.md5(repr(tuple(row)).encode()).digest()
+
+
+class SnapshotStore:
+    # Hedef tablonun anahtar -> son yazılan kaynak satırının özeti. Tabloya bu servisten başka yazan olmadığı için
+    # karşılaştırmanın hedef tarafı MySQL yerine bu yerel SQLite dosyasından okunur
+    def __init__(self, path):
+        self.path = path
+        self.created = not os.path.exists(path)
+        self.rebuild = False
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS snapshot (id PRIMARY KEY, digest BLOB NOT NULL) "
+                                "WITHOUT ROWID")
+        self.connection.execute("CREATE TEMP TABLE seen (id PRIMARY KEY) WITHOUT ROWID")
+
+    def begin(self, rebuild=False):
+        self.rebuild = rebuild
+        self.connection.execute("BEGIN")
+        if rebuild:
+            self.connection.execute("DELETE FROM snapshot")
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM snapshot").fetchone()[0]
+
+    def lookup(self, ids):
+        digests = {}
+        for chunk in batched(list(ids), SNAPSHOT_KEY_CHUNK_SIZE):
+            query = f"SELECT id, digest FROM snapshot WHERE id IN ({', '.join('?' * len(chunk))})"
+            digests.update(self.connection.execute(query, chunk))
+        return digests
+
+    def put(self, digests):
+        self.connection.executemany("INSERT OR REPLACE INTO snapshot (id, digest) VALUES (?, ?)", digests)
+
+    def delete(self, ids):
+        self.connection.executemany("DELETE FROM snapshot WHERE id = ?", ((key,) for key in ids))
+
+    def mark_seen(self, ids):
+        self.connection.executemany("INSERT OR IGNORE INTO temp.seen (id) VALUES (?)", ((key,) for key in ids))
+
+    def unseen(self):
+        query = "SELECT id FROM snapshot WHERE id NOT IN (SELECT id FROM temp.seen)"
+        return {row[0] for row in self.connection.execute(query)}
+
+    def commit(self):
+        if self.connection.in_transaction:
+            self.connection.execute("COMMIT")
+
+    def rollback(self):
+        if self.connection.in_transaction:
+            self.connection.execute("ROLLBACK")
+
+    def close(self, remove=False):
+        if self.connection is not None:
+            self.rollback()
+            self.connection.close()
+            self.connection = None
+        if remove:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+
+def open_snapshot(target_table, target=DEFAULT_TARGET):
+    directory = SNAPSHOT_DIR if target == DEFAULT_TARGET else os.path.join(SNAPSHOT_DIR, target)
+    os.makedirs(directory, exist_ok=True)
+    return SnapshotStore(os.path.join(directory, f"{target_table}.sqlite"))
+
+
+def record_snapshot(snapshot, rows, batch_size, converters=None):
+    # Doğrulama turunda MySQL ile karşılaştırılan kaynak satırlarından snapshot yeniden kurulur
+    conversions = get_conversions(converters)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            snapshot.put([(batch_row[0], row_digest(batch_row, conversions)) for batch_row in batch])
+            batch = []
+        yield row
+    snapshot.put([(batch_row[0], row_digest(batch_row, conversions)) for batch_row in batch])
+
+
+def reconcile_rows_with_snapshot(cursor_target, target_table, target_columns, target_id, source_rows, snapshot,
+                                 batch_size, upsert=False, delete_chunk_size=DELETE_CHUNK_SIZE,
+                                 max_deletes=MAX_DELETES, incremental=False, converters=None, deleted_ids=None):
+    counts = {'insert': 0, 'update': 0, 'source': 0}
+    target_count = snapshot.count()
+    conversions = get_conversions(converters)
+    rows_to_insert = []
+    rows_to_update = []
+    changed_digests = []
+
+    def flush():
+        write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update,
+                   batch_size, upsert=upsert, converters=converters)
+        # Snapshot değişiklikleri MySQL ile aynı transaction sınırında commit edilir, bkz. sync_table
+        snapshot.put(changed_digests)
+        counts['insert'] += len(rows_to_insert)
+        counts['update'] += len(rows_to_update)
+        rows_to_insert.clear()
+        rows_to_update.clear()
+        changed_digests.clear()
+
+    def compare(batch):
+        with track_phase('diff'):
+            digests = {row[0]: row_digest(row, conversions) for row in batch}
+            known = snapshot.lookup(digests.keys())
+            for row in batch:
+                digest = known.get(row[0])
+                if digest is None:
+                    rows_to_insert.append(row)
+                elif digest != digests[row[0]]:
+                    rows_to_update.append(row)
+                else:
+                    continue
+                changed_digests.append((row[0], digests[row[0]]))
+            if not incremental:
+                snapshot.mark_seen(digests.keys())
+        counts['source'] += len(batch)
+        if len(rows_to_insert) + len(rows_to_update) >= batch_size:
+            flush()
+
+    batch = []
+    for row in timed_rows(source_rows, 'source_read'):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            compare(batch)
+            batch = []
+    compare(batch)
+    flush()
+
+    if incremental:
+        ids_to_delete = snapshot.lookup(deleted_ids or ()).keys()
+        allowed = check_delete_limit(target_table, ids_to_delete, None, None, max_deletes)
+    else:
+        ids_to_delete = snapshot.unseen()
+        allowed = check_delete_limit(target_table, ids_to_delete, counts['source'], target_count, max_deletes)
+    ids_to_delete = set(ids_to_delete) if allowed else set()
+
+    delete_rows(cursor_target, target_table, target_id, ids_to_delete, delete_chunk_size)
+    snapshot.delete(ids_to_delete)
+
+    logging.info(f"{target_table}: {counts['insert']:,} inserted, {counts['update']:,} updated, "
+                 f"{len(ids_to_delete):,} deleted (compared against the local snapshot).")
+    return {'inserted': counts['insert'], 'updated': counts['update'], 'deleted': len(ids_to_delete),
+            'source_rows': None if incremental else counts['source']}
+
+
+def mssql_hash_column(column, data_type):
+    if data_type in ('datetime', 'datetime2', 'smalldatetime'):
+        expression = f"CONVERT(NVARCHAR(19), {column}, 120)"
+    elif data_type == 'date':
+        expression = f"CONVERT(NVARCHAR(10), {column}, 120)"
+    elif data_type in ('money', 'smallmoney'):
+        expression = f"CONVERT(NVARCHAR(50), CONVERT(DECIMAL(19,4), {column}))"
+    elif data_type in ('float', 'real'):
+        # Önce hedefteki FLOAT duyarlılığına indirilir, sonra iki tarafta da aynı sayıda anlamlı haneye yuvarlanır
+        value = f"CAST(CAST({column} AS REAL) AS FLOAT)"
+        digits = f"CAST(ISNULL({FLOAT_DIGITS - 1} - FLOOR(LOG10(ABS(NULLIF({value}, 0)))), 0) AS INT)"
+        expression = f"CONVERT(NVARCHAR(50), CONVERT(DECIMAL(38,6), ROUND({value}, {digits})))"
+    elif data_type == 'char':
+        # MySQL CHAR kolonlarında sondaki boşluklar okunurken atılır
+        expression = f"RTRIM(CONVERT(NVARCHAR(MAX), {column}))"
+    elif data_type == 'datetimeoffset':
+        # Hedefe format_datetimeoffset ile yazılan metin: 7 haneli kesrin son hanesi atılır
+        expression = f"STUFF(CONVERT(NVARCHAR(34), CONVERT(DATETIMEOFFSET(7), {column})), 27, 1, '')"
+    else:
+        expression = f"CONVERT(NVARCHAR(MAX), {column})"
+    return f"ISNULL({expression}, N'{HASH_NULL}')"
+
+
+def mysql_hash_column(column, data_type):
+    if data_type in ('datetime', 'datetime2', 'smalldatetime'):
+        expression = f"DATE_FORMAT({column}, '%Y-%m-%d %H:%i:%s')"
+    elif data_type == 'date':
+        expression = f"DATE_FORMAT({column}, '%Y-%m-%d')"
+    elif data_type in ('float', 'real'):
+        digits = f"CAST(IFNULL({FLOAT_DIGITS - 1} - FLOOR(LOG10(ABS(NULLIF({column}, 0)))), 0) AS SIGNED)"
+        expression = f"CAST(CAST(ROUND({column}, {digits}) AS DECIMAL(38,6)) AS CHAR)"
+    elif data_type == 'uniqueidentifier':
+        expression = f"UPPER({column})"
+    else:
+        expression = f"CAST({column} AS CHAR)"
+    return f"IFNULL({expression}, '{HASH_NULL}')"
+
+
+def get_source_data_type(cursor_source, source_schema, source_table, column):
+    metadata = get_table_metadata(cursor_source, source_schema, source_table)
+    return next(values[0] for name, values in metadata.items() if name.lower() == column.lower())
+
+
+def build_hash_expressions(cursor_source, source_schema, source_table, source_columns, target_columns):
+    source_parts = []
+    target_parts = []
+    for source_col, target_col in zip(source_columns, target_columns):
+        data_type = get_source_data_type(cursor_source, source_schema, source_table, source_col)
+        source_parts.append(mssql_hash_column(source_col, data_type))
+        target_parts.append(mysql_hash_column(target_col, data_type))
+
+    # İki taraf da aynı metnin UTF-16LE baytlarının MD5'ini hesaplar
+    source_hash = f"HASHBYTES('MD5', {MSSQL_HASH_SEPARATOR.join(source_parts)})"
+    target_hash = f"MD5(CONVERT(CONCAT_WS('|', {', '.join(target_parts)}) USING utf16le))"
+    return source_hash, target_hash
+
+
+def key_block_range(key_column, block, block_size):
+    # Her iki veritabanında da tam sayı bölmesi sıfıra doğru yuvarlar, 0 bloğu (-block_size, block_size) aralığıdır
+    if block > 0:
+        return f"{key_column} >= {block * block_size} AND {key_column} < {(block + 1) * block_size}"
+    if block < 0:
+        return f"{key_column} > {(block - 1) * block_size} AND {key_column} <= {block * block_size}"
+    return f"{key_column} > {-block_size} AND {key_column} < {block_size}"
+
+
+def fetch_block_hashes(session_mssql, cursor_target, source, source_filters, id_column, source_hash, target_table,
+                       target_id, target_hash, block_size):
+    source_query = (f"SELECT {id_column} / {block_size}, COUNT(*), "
+                    f"SUM(CONVERT(DECIMAL(38,0), CONVERT(BIGINT, SUBSTRING({source_hash}, 1, 7)))) FROM {source}")
+    if source_filters:
+        source_query += f" WHERE {' AND '.join(source_filters)}"
+    source_query += f" GROUP BY {id_column} / {block_size}"
+
+    target_query = (f"SELECT {target_id} DIV {block_size}, COUNT(*), "
+                    f"SUM(CAST(CONV(SUBSTRING({target_hash}, 1, 14), 16, 10) AS UNSIGNED)) FROM {target_table} "
+                    f"GROUP BY {target_id} DIV {block_size}")
+
+    with track_phase('source_read'):
+        source_blocks = {row[0]: (row[1], int(row[2])) for row in session_mssql.execute(text(source_query))}
+    with track_phase('target_read'):
+        target_blocks = {row[0]: (row[1], int(row[2])) for row in cursor_target.execute(text(target_query))}
+    return source_blocks, target_blocks
+
+
+def fetch_row_hashes(session_mssql, cursor_target, source, source_filters, id_column, source_hash, target_table,
+                     target_id, target_hash, block=None, block_size=None):
+    source_filters = list(source_filters)
+    target_filters = []
+    if block is not None:
+        source_filters.append(key_block_range(id_column, block, block_size))
+        target_filters.append(key_block_range(target_id, block, block_size))
+
+    source_query = f"SELECT {id_column}, {source_hash} FROM {source}"
+    if source_filters:
+        source_query += f" WHERE {' AND '.join(source_filters)}"
+    target_query = f"SELECT {target_id}, UNHEX({target_hash}) FROM {target_table}"
+    if target_filters:
+        target_query += f" WHERE {' AND '.join(target_filters)}"
+
+    with track_phase('source_read'):
+        source_hashes = {row[0]: row[1] for row in session_mssql.execute(text(source_query))}
+    with track_phase('target_read'):
+        target_hashes = {row[0]: row[1] for row in cursor_target.execute(text(target_query))}
+    return source_hashes, target_hashes
+
+
+class DigestKeys:
+    # Özet anahtar tamponu tam sayı dizisi gibi indekslenir: her eleman key_size baytlık bir anahtardır
+    def __init__(self, buffer, key_size):
+        self.buffer = buffer
+        self.key_size = key_size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.buffer[index.start * self.key_size:index.stop * self.key_size]
+        return bytes(self.buffer[index * self.key_size:(index + 1) * self.key_size])
+
+
+class KeyIndex:
+    # Sıralı tam sayı anahtarlar array('q') içinde, özetler sabit genişlikli baytlar olarak tutulur. key_size verilirse
+    # anahtar yerine key_size baytlık anahtar özeti tutulur ve sıra bu özete göredir; gerçek anahtar kodlanıp ayrı bir
+    # tampona yazılır ve sadece farklı çıkan satırlar için çözülür. Bellek sınırı aşılınca hepsi geçici dosyalara
+    # yazılır ve mmap üzerinden okunur
+    def __init__(self, digest_size=16, memory_limit=KEY_INDEX_MEMORY_LIMIT, key_size=None):
+        self.digest_size = digest_size
+        self.memory_limit = memory_limit
+        self.key_size = key_size
+        self.entry_size = (8 if key_size is None else key_size + 8) + digest_size
+        self.count = 0
+        self.pending = 0
+        self.labels_size = 0
+        self.last_key = None
+        self.files = None
+        self.maps = None
+        self.reset()
+
+    def reset(self):
+        self.keys = array('q') if self.key_size is None else bytearray()
+        self.digests = bytearray()
+        self.labels = bytearray()
+        self.label_ends = array('q')
+        self.pending = 0
+
+    def buffers(self):
+        if self.key_size is None:
+            return [self.keys, self.digests]
+        return [self.keys, self.digests, self.labels, self.label_ends]
+
+    def append(self, key, digest, label=None):
+        if self.count and key <= self.last_key:
+            raise Exception(f"Keys are not in strictly ascending order ({self.last_key!r} before {key!r}).")
+        if len(digest) != self.digest_size:
+            raise Exception(f"Expected a {self.digest_size} byte digest for key {key!r}, got {len(digest)} bytes.")
+
+        if self.key_size is None:
+            self.keys.append(key)
+        else:
+            if len(key) != self.key_size:
+                raise Exception(f"Expected a {self.key_size} byte key digest for {label!r}, got {len(key)} bytes.")
+            self.keys += key
+            # Metin anahtarlar doğrudan, diğerleri JSON olarak yazılır; ilk bayt hangisi olduğunu gösterir
+            encoded = b's' + label.encode() if isinstance(label, str) else \
+                b'j' + json.dumps(encode_watermark(label)).encode()
+            self.labels += encoded
+            self.labels_size += len(encoded)
+            self.label_ends.append(self.labels_size)
+        self.digests += digest
+        self.count += 1
+        self.pending += 1
+        self.last_key = key
+        if self.pending * self.entry_size + len(self.labels) >= self.memory_limit:
+            self.spill()
+
+    def spill(self):
+        if self.files is None:
+            logging.debug(f"Key index exceeded {self.memory_limit:,} bytes, spilling to disk.")
+            self.files = [tempfile.TemporaryFile() for _ in self.buffers()]
+        for file, buffer in zip(self.files, self.buffers()):
+            if isinstance(buffer, array):
+                buffer.tofile(file)
+            else:
+                file.write(buffer)
+        self.reset()
+
+    def finish(self):
+        if self.files is not None:
+            self.spill()
+            for file in self.files:
+                file.flush()
+            self.maps = [mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) for file in self.files]
+            views = [memoryview(index_map) for index_map in self.maps]
+            self.keys = views[0].cast('q') if self.key_size is None else views[0]
+            self.digests = views[1]
+            if self.key_size is not None:
+                self.labels = views[2]
+                self.label_ends = views[3].cast('q')
+        return self
+
+    def key_view(self):
+        return self.keys if self.key_size is None else DigestKeys(self.keys, self.key_size)
+
+    def real_key(self, index):
+        if self.key_size is None:
+            return self.keys[index]
+        start = self.label_ends[index - 1] if index else 0
+        encoded = bytes(self.labels[start:self.label_ends[index]])
+        if encoded[:1] == b's':
+            return encoded[1:].decode()
+        return decode_watermark(json.loads(encoded[1:]))
+
+    def digest(self, index, end=None):
+        return self.digests[index * self.digest_size:(index + 1 if end is None else end) * self.digest_size]
+
+    def close(self):
+        if self.maps is not None:
+            for view in (self.keys, self.digests, self.labels, self.label_ends):
+                if isinstance(view, memoryview):
+                    view.release()
+            for index_map in self.maps:
+                index_map.close()
+        if self.files is not None:
+            for file in self.files:
+                file.close()
+        self.reset()
+        self.files = self.maps = None
+
+
+def fetch_hash_indexes(session_mssql, cursor_target, source, source_filters, id_column, source_hash, target_table,
+                       target_id, target_hash, fetch_size=FETCH_SIZE, key_hashes=None):
+    # key_hashes verilirse iki taraf da anahtar özetinin sırasıyla okunur, karşılaştırma özet üzerinden yapılır
+    if key_hashes is None:
+        source_query = f"SELECT {id_column}, {source_hash} FROM {source}"
+        target_query = f"SELECT {target_id}, UNHEX({target_hash}) FROM {target_table} ORDER BY {target_id}"
+        order = id_column
+    else:
+        source_query = f"SELECT {id_column}, {source_hash}, {key_hashes[0]} FROM {source}"
+        target_query = (f"SELECT {target_id}, UNHEX({target_hash}), UNHEX({key_hashes[1]}) AS key_hash "
+                        f"FROM {target_table} ORDER BY key_hash")
+        order = '3'
+    if source_filters:
+        source_query += f" WHERE {' AND '.join(source_filters)}"
+    source_query += f" ORDER BY {order}"
+
+    def append(index, row):
+        if key_hashes is None:
+            index.append(row[0], row[1])
+        else:
+            index.append(row[2], row[1], row[0])
+
+    # Satırlar listeye alınmadan, geldikçe indekse eklenir
+    key_size = None if key_hashes is None else 16
+    source_index = KeyIndex(key_size=key_size)
+    target_index = KeyIndex(key_size=key_size)
+    try:
+        with track_phase('source_read'):
+            for row in session_mssql.execute(text(source_query), execution_options={'yield_per': fetch_size}):
+                append(source_index, row)
+        with track_phase('target_read'):
+            target_statement = text(target_query).execution_options(stream_results=True, yield_per=fetch_size)
+            for row in cursor_target.execute(target_statement):
+                append(target_index, row)
+    except Exception:
+        source_index.close()
+        target_index.close()
+        raise
+
+    return source_index.finish(), target_index.finish()
+
+
+@track_phase('diff')
+def diff_key_indexes(source_index, target_index):
+    ids_to_insert = set()
+    ids_to_update = set()
+    ids_to_delete = set()
+    source_keys = source_index.key_view()
+    target_keys = target_index.key_view()
+    i = j = 0
+
+    while i < source_index.count or j < target_index.count:
+        # Değişmeyen uzun aralıklar anahtar ve özet dilimleri birlikte karşılaştırılarak tek adımda geçilir, eşleşmeyen
+        # dilim farkın yerine kadar küçültülür
+        run = min(KEY_INDEX_RUN, source_index.count - i, target_index.count - j)
+        while run > 1 and (source_keys[i:i + run] != target_keys[j:j + run] or
+                           source_index.digest(i, i + run) != target_index.digest(j, j + run)):
+            run //= 8
+        if run > 1:
+            i += run
+            j += run
+        elif j == target_index.count or (i < source_index.count and source_keys[i] < target_keys[j]):
+            ids_to_insert.add(source_index.real_key(i))
+            i += 1
+        elif i == source_index.count or target_keys[j] < source_keys[i]:
+            ids_to_delete.add(target_index.real_key(j))
+            j += 1
+        else:
+            if source_index.digest(i) != target_index.digest(j):
+                ids_to_update.add(source_index.real_key(i))
+            i += 1
+            j += 1
+
+    return ids_to_insert, ids_to_update, ids_to_delete
+
+
+@track_phase('diff')
+def diff_hashes(source_hashes, target_hashes):
+    ids_to_insert = source_hashes.keys() - target_hashes.keys()
+    ids_to_update = {key for key, value in source_hashes.items()
+                     if key in target_hashes and target_hashes[key] != value}
+    ids_to_delete = target_hashes.keys() - source_hashes.keys()
+    return ids_to_insert, ids_to_update, ids_to_delete
+
+
+@track_phase('source_read')
+def fetch_source_rows_by_key(session_mssql, source_columns, source, id_column, ids, filters=()):
+    columns_list = ', '.join(source_columns)
+    key_filters = ' AND '.join([f"{id_column} IN :ids"] + list(filters))
+    source_query = get_statement(('select_source', source, columns_list, key_filters), lambda: build_key_statement(
+        f"SELECT {columns_list} FROM {source} WHERE {key_filters}"))
+
+    rows = []
+    for chunk in batched(sorted(ids), SOURCE_KEY_CHUNK_SIZE):
+        rows.extend(session_mssql.execute(source_query, {'ids': chunk}).fetchall())
+    return rows
+
+
+def reconcile_rows_by_hash(session_mssql, cursor_target, source_schema, source_table, source_columns, source_filters,
+                           id_column, target_table, target_columns, target_id, batch_size, hash_block_size=None,
+                           upsert=False, delete_chunk_size=DELETE_CHUNK_SIZE, max_deletes=MAX_DELETES,
+                           converters=None, key_type=None):
+    source = f"{source_schema}.{source_table}"
+    source_hash, target_hash = build_hash_expressions(session_mssql, source_schema, source_table, source_columns[1:],
+                                                      target_columns[1:])
+
+    if hash_block_size:
+        # Önce anahtar aralığı bloklarının özetleri karşılaştırılır, sadece farklı bloklar satır satır incelenir
+        source_blocks, target_blocks = fetch_block_hashes(session_mssql, cursor_target, source, source_filters,
+                                                          id_column, source_hash, target_table, target_id,
+                                                          target_hash, hash_block_size)
+        changed_blocks = sorted(block for block in source_blocks.keys() | target_blocks.keys()
+                                if source_blocks.get(block) != target_blocks.get(block))
+        logging.debug(f"{target_table}: {len(changed_blocks)} of {len(source_blocks)} key blocks changed.")
+
+        source_count = sum(count for count, _ in source_blocks.values())
+        target_count = sum(count for count, _ in target_blocks.values())
+        source_hashes = {}
+        target_hashes = {}
+        for block in changed_blocks:
+            block_source, block_target = fetch_row_hashes(session_mssql, cursor_target, source, source_filters,
+                                                           id_column, source_hash, target_table, target_id,
+                                                           target_hash, block, hash_block_size)
+            source_hashes.update(block_source)
+            target_hashes.update(block_target)
+        ids_to_insert, ids_to_update, ids_to_delete = diff_hashes(source_hashes, target_hashes)
+    elif key_type in INTEGER_TYPES + DIGEST_KEY_TYPES:
+        # Sözlük yerine sıralı dizi indeksleri kullanılır: tam sayı anahtarlarda satır başına yaklaşık 24 bayt, metin
+        # anahtarlarda 40 bayt ve gerçek anahtarın kendisi
+        key_hashes = None
+        if key_type not in INTEGER_TYPES:
+            key_hashes = build_hash_expressions(session_mssql, source_schema, source_table, source_columns[:1],
+                                                target_columns[:1])
+        source_index, target_index = fetch_hash_indexes(session_mssql, cursor_target, source, source_filters,
+                                                        id_column, source_hash, target_table, target_id, target_hash,
+                                                        key_hashes=key_hashes)
+        try:
+            source_count = source_index.count
+            target_count = target_index.count
+            ids_to_insert, ids_to_update, ids_to_delete = diff_key_indexes(source_index, target_index)
+        finally:
+            source_index.close()
+            target_index.close()
+    else:
+        # Diğer anahtar tiplerinin hash metni kayıplı olabilir (ör. datetime saniyeye yuvarlanır), farklı anahtarlar
+        # aynı özete düşebileceği için gerçek anahtarlarla sözlükte karşılaştırılır
+        source_hashes, target_hashes = fetch_row_hashes(session_mssql, cursor_target, source, source_filters,
+                                                        id_column, source_hash, target_table, target_id, target_hash)
+        source_count = len(source_hashes)
+        target_count = len(target_hashes)
+        ids_to_insert, ids_to_update, ids_to_delete = diff_hashes(source_hashes, target_hashes)
+
+    if not check_delete_limit(target_table, ids_to_delete, source_count, target_count, max_deletes):
+        ids_to_delete = set()
+    delete_rows(cursor_target, target_table, target_id, ids_to_delete, delete_chunk_size)
+
+    # Tam satırlar sadece özeti farklı olan anahtarlar için okunur
+    changed_rows = fetch_source_rows_by_key(session_mssql, source_columns, source, id_column,
+                                            ids_to_insert | ids_to_update)
+    rows_to_insert = [row for row in changed_rows if row[0] in ids_to_insert]
+    rows_to_update = [row for row in changed_rows if row[0] in ids_to_update]
+    write_rows(cursor_target, target_table, target_columns, target_id, rows_to_insert, rows_to_update, batch_size,
+               upsert=upsert, converters=converters)
+
+    logging.info(f"{target_table}: {len(rows_to_insert):,} inserted, {len(rows_to_update):,} updated, "
+                 f"{len(ids_to_delete):,} deleted.")
+    return {'inserted': len(rows_to_insert), 'updated': len(rows_to_update), 'deleted': len(ids_to_delete),
+            'source_rows': source_count}
+
+
+@track_phase('source_read')
+def fetch_change_versions(session_mssql, change_source, source, capture_instance):
+    if change_source == 'cdc':
+        query = "SELECT sys.fn_cdc_get_max_lsn(), sys.fn_cdc_get_min_lsn(:capture_instance)"
+        current_version, min_version = session_mssql.execute(text(query), {'capture_instance': capture_instance}).one()
+        # Olmayan capture instance için min LSN sıfır döner
+        if not min_version or not any(min_version):
+            raise Exception(f"CDC capture instance {capture_instance} does not exist for {source}.")
+    else:
+        query = (f"SELECT CHANGE_TRACKING_CURRENT_VERSION(), "
+                 f"CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{source}'))")
+        current_version, min_version = session_mssql.execute(text(query)).one()
+        if min_version is None:
+            raise Exception(f"Change tracking is not enabled for {source}.")
+    return current_version, min_version
+
+
+@track_phase('source_read')
+def fetch_changed_keys(session_mssql, change_source, source, capture_instance, id_column, change_version,
+                       current_version):
+    if change_source == 'cdc':
+        if change_version >= current_version:
+            return set()
+        query = (f"SELECT {id_column} FROM cdc.fn_cdc_get_net_changes_{capture_instance}("
+                 f"sys.fn_cdc_increment_lsn(:change_version), :current_version, N'all')")
+        params = {'change_version': change_version, 'current_version': current_version}
+    else:
+        query = f"SELECT {id_column} FROM CHANGETABLE(CHANGES {source}, :change_version) AS ct"
+        params = {'change_version': change_version}
+
+    return {row[0] for row in session_mssql.execute(text(query), params)}
+
+
+def reconcile_changes(session_mssql, cursor_target, source, source_columns, source_filters, id_column, target_table,
+                      target_columns, target_id, changed_ids, comparators, batch_size, upsert=False,
+                      delete_chunk_size=DELETE_CHUNK_SIZE, max_deletes=MAX_DELETES, converters=None, snapshot=None):
+    logging.debug(f"{target_table}: {len(changed_ids):,} keys changed on the source.")
+
+    # Değişen anahtarların güncel hali okunur; bu arada silinen ya da artık koşula uymayan kayıtlar hedeften silinir
+    source_data = fetch_source_rows_by_key(session_mssql, source_columns, source, id_column, changed_ids,
+                                           source_filters)
+    deleted_ids = changed_ids - {row[0] for row in source_data}
+
+    return reconcile_rows(cursor_target, target_table, target_columns, target_id, source_data, comparators,
+                          batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size, max_deletes=max_deletes,
+                          incremental=True, converters=converters, deleted_ids=deleted_ids, snapshot=snapshot)
+
+
+def target_table_exists(cursor_target, target_table):
+    return bool(cursor_target.execute(text(f"SHOW TABLES LIKE '{target_table}'")).fetchall())
+
+
+def target_table_is_empty(cursor_target, target_table):
+    return cursor_target.execute(text(f"SELECT 1 FROM {target_table} LIMIT 1")).first() is None
+
+
+def load_initial_data(session_mssql, cursor_target, select_list, source, filters, key_column, target_table,
+                      target_columns, target_id, last_key=None, chunk_size=INITIAL_LOAD_CHUNK_SIZE,
+                      batch_size=BATCH_SIZE, disable_keys=False, converters=None, state_name=None):
+    state_name = state_name or target_table
+    logging.info(f"Starting initial load of {target_table} from {source}"
+                 f"{f', resuming after key {last_key!r}' if last_key is not None else ''}.")
+
+    if last_key is not None:
+        # Checkpoint kaydedilmeden önce commit edilmiş bir parça varsa tekrar yüklenmeden önce temizlenir
+        cursor_target.execute(text(f"DELETE FROM {target_table} WHERE {target_id} > :last_key"), {'last_key': last_key})
+        cursor_target.commit()
+
+    if disable_keys:
+        cursor_target.execute(text(f"ALTER TABLE {target_table} DISABLE KEYS"))
+
+    loaded = 0
+    try:
+        while True:
+            chunk_filters = list(filters)
+            if last_key is not None:
+                chunk_filters.append(f"{key_column} > :last_key")
+
+            chunk_query = f"SELECT TOP ({chunk_size}) {select_list} FROM {source}"
+            if chunk_filters:
+                chunk_query += f" WHERE {' AND '.join(chunk_filters)}"
+            chunk_query += f" ORDER BY {key_column}"
+
+            # Çoklu hedefte parçalar paylaşılmaz, her hedef kendi ilerlemesiyle okur
+            with track_phase('source_read'):
+                rows = session_mssql.execute(text(chunk_query), {'last_key': last_key},
+                                             execution_options={'shared_source': False}).fetchall()
+            if not rows:
+                break
+
+            # Her parça ayrı commit edilir ve son anahtar checkpoint olarak kaydedilir
+            write_rows(cursor_target, target_table, target_columns, target_id, rows, [], batch_size,
+                       converters=converters)
+            cursor_target.commit()
+            last_key = rows[-1][0]
+            loaded += len(rows)
+            update_sync_state(state_name, {'initial_load_key': encode_watermark(last_key)})
+            logging.info(f"Initial load of {target_table}: {loaded} rows copied, last key {last_key!r}.")
+    except Exception:
+        # Bağlantı kopmuş olabilir; ENABLE KEYS de başarısız olursa asıl hata kaybolmasın diye sadece loglanır
+        if disable_keys:
+            try:
+                cursor_target.execute(text(f"ALTER TABLE {target_table} ENABLE KEYS"))
+            except Exception as enable_error:
+                logging.error(f"Failed to re-enable keys on {target_table}: {str(enable_error)}")
+        raise
+
+    if disable_keys:
+        cursor_target.execute(text(f"ALTER TABLE {target_table} ENABLE KEYS"))
+
+    update_sync_state(state_name, {'initial_load_key': None})
+    logging.info(f"Initial load of {target_table} completed with {loaded} rows.")
+    return {'inserted': loaded, 'updated': 0, 'deleted': 0, 'initial_load': True}
+
+
+def sync_data(session_mssql, cursor_target, source_schema, source_table, target_table, columns, id_column, table_as_is,
+              column_as_is, target_id=None, conditions=None, query=None, batch_size=BATCH_SIZE, upsert=False,
+              delete_chunk_size=DELETE_CHUNK_SIZE, max_deletes=MAX_DELETES, watermark_column=None, watermark=None,
+              streaming=STREAMING, fetch_size=FETCH_SIZE, initial_load=True, initial_load_key=None,
+              initial_load_chunk_size=INITIAL_LOAD_CHUNK_SIZE, disable_keys=False, compare_mode='rows',
+              hash_block_size=None, change_source=None, change_version=None, cdc_capture_instance=None,
+              snapshot=None, state_name=None, watermark_margin=WATERMARK_MARGIN, min_active_rowversion=None):
+    logging.debug(f"Starting data synchronization between {source_schema}.{source_table} and {target_table}.")
+
+    incremental = watermark_column is not None and watermark is not None
+    # Artımlı turlar zaten küçük olduğu için streaming sadece tam karşılaştırmada kullanılır
+    streaming = streaming and not incremental
+
+    # Doğrulama turunda hedef MySQL'den okunur ve snapshot kaynak satırlarından yeniden kurulur
+    rebuild_snapshot = snapshot is not None and snapshot.rebuild
+    compare_snapshot = None if rebuild_snapshot else snapshot
+
+    def source_rows(rows, converters=None):
+        return record_snapshot(snapshot, rows, batch_size, converters) if rebuild_snapshot else rows
+
+    # Eğer 'query' varsa, sorguyu çalıştır ve sonuçları doğrudan aktar
+    if query:
+        new_watermark = None
+        if watermark_column:
+            # Okumadan önce alınan üst sınır, okuma sırasında değişen kayıtların bir sonraki turda gelmesini sağlar
+            new_watermark = fetch_watermark(session_mssql, f"({query}) AS q", watermark_column,
+                                            margin=watermark_margin, min_active_rowversion=min_active_rowversion)
+
+        # Sorgunun ilk kolonu id olmalı, kolonlar 'columns' sırasıyla hedefe yazılır
+        target_columns = list(columns.values())
+        comparators = [same_second] * len(target_columns)
+
+        if initial_load and (initial_load_key is not None or target_table_is_empty(cursor_target, target_table)):
+            stats = load_initial_data(session_mssql, cursor_target, '*', f"({query}) AS q", [], f"q.{id_column}",
+                                      target_table, target_columns, target_id, last_key=initial_load_key,
+                                      chunk_size=initial_load_chunk_size, batch_size=batch_size,
+                                      disable_keys=disable_keys, state_name=state_name)
+        elif streaming:
+            logging.debug(f"Streaming custom query: {query}")
+            result = session_mssql.execute(text(f"SELECT * FROM ({query}) AS q ORDER BY 1"),
+                                           execution_options={'yield_per': fetch_size})
+            stats = reconcile_rows_streaming(cursor_target, target_table, target_columns, target_id,
+                                             source_rows(iter(result)), comparators, batch_size,
+                                             fetch_size=fetch_size, upsert=upsert,
+                                             delete_chunk_size=delete_chunk_size, max_deletes=max_deletes,
+                                             snapshot=compare_snapshot)
+        else:
+            with track_phase('source_read'):
+                if incremental:
+                    logging.debug(f"Executing custom query for rows with {watermark_column} > {watermark}: {query}")
+                    result = session_mssql.execute(
+                        text(f"SELECT * FROM ({query}) AS q WHERE {watermark_column} > :watermark"),
+                        {'watermark': watermark})
+                else:
+                    logging.debug(f"Executing custom query: {query}")
+                    result = session_mssql.execute(text(query))
+                source_data = list(source_rows(result.fetchall()))
+
+            stats = reconcile_rows(cursor_target, target_table, target_columns, target_id, source_data, comparators,
+                                   batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                                   max_deletes=max_deletes, incremental=incremental, snapshot=compare_snapshot)
+        if stats.get('initial_load') and initial_load_key is not None:
+            # Devam eden yüklemenin önceki parçaları bu watermark'tan önce kopyalandı; watermark kaydedilmez, bir
+            # sonraki tur tam karşılaştırma yapar
+            stats['watermark'] = None
+        else:
+            stats['watermark'] = new_watermark if new_watermark is not None else watermark
 
         logging.debug(f"Data synchronization between {source_schema}.{source_table} and {target_table} completed.")
-        return  # 'query' varsa başka işlem yapılmasına gerek yok
+        return stats  # 'query' varsa başka işlem yapılmasına gerek yok
 
     # Eğer 'query' yoksa, normal eşleştirme ve kolon kontrolüne geç
     else:
@@ -322,153 +2070,783 @@ def sync_data(session_mssql, cursor_target, source_schema, source_table, target_
             if target_id:
                 columns[id_column] = target_id
 
-        logging.debug(f"Fetching data from {source_schema}.{source_table}.")
+        comparable_columns = filter_comparable_columns(session_mssql, source_schema, source_table, columns)
+
+        # id kolonu her iki tarafta da ilk sırada okunur
+        source_columns = [id_column] + [col for col in comparable_columns.keys() if col != id_column]
+        target_columns = [target_id] + [comparable_columns[col] for col in source_columns[1:]]
+        converters, comparators = compile_table_types(session_mssql, source_schema, source_table, source_columns)
+
+        new_watermark = None
+        if watermark_column:
+            new_watermark = fetch_watermark(session_mssql, f"{source_schema}.{source_table}", watermark_column,
+                                            conditions, margin=watermark_margin,
+                                            min_active_rowversion=min_active_rowversion)
+
+        source_filters = [f"({conditions})"] if conditions else []
+
+        # Kaynak sürümü veri okunmadan önce alınır, okuma sırasında gelen değişiklikler bir sonraki turda tekrar uygulanır
+        change_versions = None
+        if change_source:
+            change_versions = fetch_change_versions(session_mssql, change_source, f"{source_schema}.{source_table}",
+                                                    cdc_capture_instance)
+
+        if initial_load and initial_load_key is None and not target_table_exists(cursor_target, target_table):
+            create_target_table(cursor_target, target_table, columns, session_mssql, source_schema, source_table,
+                                column_as_is, target_id)
+
+        if initial_load and (initial_load_key is not None or target_table_is_empty(cursor_target, target_table)):
+            stats = load_initial_data(session_mssql, cursor_target, ', '.join(source_columns),
+                                      f"{source_schema}.{source_table}", source_filters, id_column, target_table,
+                                      target_columns, target_id, last_key=initial_load_key,
+                                      chunk_size=initial_load_chunk_size, batch_size=batch_size,
+                                      disable_keys=disable_keys, converters=converters, state_name=state_name)
+            # Yarıda kalıp devam eden bir yüklemenin önceki parçaları bu watermark ve sürümden önce kopyalandığı için
+            # ikisi de kaydedilmez, bir sonraki tur tam karşılaştırma yapar
+            if initial_load_key is None:
+                stats['watermark'] = new_watermark if new_watermark is not None else watermark
+            else:
+                stats['watermark'] = None
+            stats['change_version'] = change_versions[0] if change_versions and initial_load_key is None else None
+            return stats
 
-        source_query = f"SELECT {id_column} FROM {source_schema}.{source_table}"
-        if conditions:
-            source_query += f" WHERE {conditions}"
+        logging.debug(f"Fetching comparable data from {source_schema}.{source_table}.")
+        source_query = f"SELECT {', '.join(source_columns)} FROM {source_schema}.{source_table}"
+        filters = list(source_filters)
+        if incremental:
+            filters.append(f"{watermark_column} > :watermark")
+        if filters:
+            source_query += f" WHERE {' AND '.join(filters)}"
+
+        changed_ids = None
+        if change_versions and change_version is not None:
+            if change_version >= change_versions[1]:
+                changed_ids = fetch_changed_keys(session_mssql, change_source, f"{source_schema}.{source_table}",
+                                                 cdc_capture_instance, id_column, change_version, change_versions[0])
+            else:
+                logging.warning(f"Saved {change_source} version of {target_table} is older than the retention "
+                                f"period, falling back to a full snapshot.")
+
+        if changed_ids is not None:
+            stats = reconcile_changes(session_mssql, cursor_target, f"{source_schema}.{source_table}", source_columns,
+                                      source_filters, id_column, target_table, target_columns, target_id, changed_ids,
+                                      comparators, batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                                      max_deletes=max_deletes, converters=converters, snapshot=compare_snapshot)
+        elif compare_mode == 'hash' and not incremental:
+            block_size = hash_block_size
+            key_type = get_source_data_type(session_mssql, source_schema, source_table, id_column)
+            if block_size and key_type not in INTEGER_TYPES:
+                logging.warning(f"hash_block_size is ignored for {target_table} because {id_column} is not an integer.")
+                block_size = None
+
+            stats = reconcile_rows_by_hash(session_mssql, cursor_target, source_schema, source_table, source_columns,
+                                           source_filters, id_column, target_table, target_columns, target_id,
+                                           batch_size, hash_block_size=block_size, upsert=upsert,
+                                           delete_chunk_size=delete_chunk_size, max_deletes=max_deletes,
+                                           converters=converters, key_type=key_type)
+        elif streaming:
+            source_query += f" ORDER BY {id_column}"
+            result = session_mssql.execute(text(source_query), execution_options={'yield_per': fetch_size})
+            stats = reconcile_rows_streaming(cursor_target, target_table, target_columns, target_id,
+                                             source_rows(iter(result), converters), comparators, batch_size,
+                                             fetch_size=fetch_size, upsert=upsert,
+                                             delete_chunk_size=delete_chunk_size, max_deletes=max_deletes,
+                                             converters=converters, snapshot=compare_snapshot)
+        else:
+            with track_phase('source_read'):
+                result = session_mssql.execute(text(source_query), {'watermark': watermark} if incremental else {})
+                source_data = list(source_rows(result.fetchall(), converters))
 
-        result = session_mssql.execute(text(source_query))
-        source_data = result.fetchall()
-        source_ids = set([row[0] for row in source_data])
+            stats = reconcile_rows(cursor_target, target_table, target_columns, target_id, source_data, comparators,
+                                   batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                                   max_deletes=max_deletes, incremental=incremental, converters=converters,
+                                   snapshot=compare_snapshot)
+        stats['watermark'] = new_watermark if new_watermark is not None else watermark
+        stats['change_version'] = change_versions[0] if change_versions else None
 
-        # Target tablodaki veriyi çek
-        logging.debug(f"Fetching data from {target_table}.")
-        target_query = f"SELECT {target_id} FROM {target_table}"
-        result = cursor_target.execute(text(target_query))
-        target_data = result.fetchall()
-        target_ids = set([row[0] for row in target_data])
+        logging.debug(f"Data synchronization between {source_schema}.{source_table} and {target_table} completed.")
+        return stats
 
-        # Silinecek ID'leri belirle
-        ids_to_delete = target_ids - source_ids
-        logging.debug(f"IDs to delete: {ids_to_delete}")
 
-        for delete_id in ids_to_delete:
-            delete_query = f"DELETE FROM {target_table} WHERE {target_id} = {delete_id}"
-            logging.info(f"Executing delete query: {delete_query}")
-            cursor_target.execute(text(delete_query))
+def resolve_target_table(table):
+    if table.get('table_as_is', 0) == 1:
+        return table.get('source_table')
 
-        comparable_columns = filter_comparable_columns(session_mssql, source_schema, source_table, columns)
+    if 'target_table' not in table:
+        raise Exception(f"target_table must be specified in JSON because table_as_is = 0")
+    return table['target_table']
 
-        logging.debug(f"Fetching comparable data from {source_schema}.{source_table}.")
-        source_query = f"SELECT {id_column}, {', '.join([col for col in comparable_columns.keys() if col != id_column])} FROM {source_schema}.{source_table}"
-        if conditions:
-            source_query += f" WHERE {conditions}"
-
-        result = session_mssql.execute(text(source_query))
-        source_data = result.fetchall()
-
-        for row in source_data:
-            row_data = {}
-            column_order = list(comparable_columns.keys())
-
-            for i, col in enumerate(column_order):
-                if i < len(row):
-                    row_data[col] = row[i]
-
-            id_value = row[0]
-
-            check_query = f"SELECT {', '.join(comparable_columns.values())} FROM {target_table} WHERE {target_id} = {id_value}"
-            logging.debug(f"Check query: {check_query}")
-            result = cursor_target.execute(text(check_query))
-            target_row = result.fetchone()
-
-            if target_row:
-                # Verilerin farklı olup olmadığını kontrol et
-                needs_update = False
-                update_data = []
-
-                for idx, (source_col, target_col) in enumerate(comparable_columns.items()):
-                    source_value = row_data[source_col]
-                    target_value = target_row[idx]
-
-                    if source_col in ['CREATE_DATE', 'MODIFY_DATE', 'created_at', 'modified_at']:
-                        if isinstance(source_value, datetime.datetime) and isinstance(target_value, datetime.datetime):
-                            source_value_str = source_value.strftime('%Y-%m-%d %H:%M:%S')
-                            target_value_str = target_value.strftime('%Y-%m-%d %H:%M:%S')
-                            if source_value_str != target_value_str:
-                                needs_update = True
-                                update_data.append(f"{target_col} = '{source_value_str}'")
-                        continue  # Tarih alanını bu koşullar altında geç
-
-                    # Diğer alanlar için normal karşılaştırma
-                    if source_value != target_value:
-                        needs_update = True
-                        if isinstance(source_value, str):
-                            update_data.append(f"{target_col} = '{source_value}'")
-                        elif isinstance(source_value, datetime.datetime):
-                            update_data.append(f"{target_col} = '{source_value.strftime('%Y-%m-%d %H:%M:%S.%f')}'")
-                        else:
-                            update_data.append(f"{target_col} = {source_value}")
-
-                # Güncelleme gerekiyorsa UPDATE sorgusunu çalıştır
-                if needs_update:
-                    update_query = f"UPDATE {target_table} SET {', '.join(update_data)} WHERE {target_id} = {id_value}"
-                    logging.info(f"Update query: {update_query}")
-                    cursor_target.execute(text(update_query))
-            else:
-                # Yeni bir kayıt ekle
-                columns_list = ', '.join(list(comparable_columns.values()))
-                values_list = ', '.join(
-                    [
-                        f"'{binascii.hexlify(row_data[col]).decode()}'" if isinstance(row_data[col], bytes) else
-                        f"'{row_data[col].strftime('%Y-%m-%d %H:%M:%S.%f')}'" if isinstance(row_data[col],
-                                                                                            datetime.datetime) else
-                        f"'{row_data[col]}'" if isinstance(row_data[col], str) else
-                        str(row_data[col])
-                        for col in row_data.keys()
-                    ]
-                )
-
-                insert_query = f"INSERT INTO {target_table} ({columns_list}) VALUES ({values_list})"
-                logging.info(f"Insert query: {insert_query}")
-                cursor_target.execute(text(insert_query))
 
-        logging.debug(f"Data synchronization between {source_schema}.{source_table} and {target_table} completed.")
+def get_table_dependencies(tables):
+    dependencies = {name: table.get('depends_on', []) for name, table in tables.items()}
 
+    for name, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency not in tables:
+                raise Exception(f"Table {name} depends on {dependency}, which is not configured in JSON")
 
-def sync(json_file, mssql_pool, mysql_pool):
-    session_mssql = mssql_pool()
-    conn_mysql = mysql_pool.connect()
+    # Döngüsel bağımlılıkları baştan yakala, aksi halde bu tablolar hiç çalışmaz
+    visited = set()
 
+    def visit(name, path):
+        if name in path:
+            raise Exception(f"Circular table dependency: {' -> '.join(path + [name])}")
+        if name in visited:
+            return
+        for dependency in dependencies[name]:
+            visit(dependency, path + [name])
+        visited.add(name)
+
+    for name in dependencies:
+        visit(name, [])
+
+    return dependencies
+
+
+def get_worker_count(sync_config, mssql_pool, *mysql_pools):
+    workers = sync_config.get('workers', SYNC_WORKERS)
+
+    # Her tablo bir MSSQL ve her hedefte bir MySQL bağlantısı kullanır, havuzlardan fazla işçi çalıştırmanın anlamı yok
+    capacity = min([mssql_pool.kw['bind'].pool.size()] + [mysql_pool.pool.size() for mysql_pool in mysql_pools])
+    return max(1, min(workers, capacity))
+
+
+def open_worker_connection(pool, database):
+    # Havuzdan bağlantı alma süresi ayrıca ölçülür
+    wait_start = time.perf_counter()
+    connection = pool.kw['bind'].connect() if database == 'mssql' else pool.connect()
+    record_metric('pool_wait_seconds', (database,), time.perf_counter() - wait_start)
+
+    now = time.monotonic()
+    return {'database': database, 'connection': connection, 'opened_at': now, 'used_at': now}
+
+
+def close_connection(entry):
     try:
-        sync_config = load_sync_config(json_file)
-
-        for table in sync_config['tables']:
-            source_table = table.get('source_table')
-            source_schema = table.get('source_schema')
-            table_as_is = table.get('table_as_is', 0)
-            column_as_is = table.get('column_as_is', 0)
-            target_id = table.get('target_id', None)
-            conditions = table.get('conditions', None)
-            query = table.get('query', None)
-
-            if table_as_is == 1:
-                target_table = source_table
-            else:
-                if 'target_table' not in table:
-                    raise Exception(f"target_table must be specified in JSON because table_as_is = 0")
-                target_table = table['target_table']
+        entry['connection'].close()
+    except Exception as close_error:
+        logging.debug(f"Closing {entry['database']} connection failed: {str(close_error)}")
 
-            if column_as_is == 1:
-                columns = get_source_columns(session_mssql, source_schema, source_table)
-                columns = {col: col for col in columns}
-            else:
-                if 'columns' not in table:
-                    raise Exception(f"columns must be specified in JSON because column_as_is = 0")
-                columns = table['columns']
 
-            id_column = table['id_column']
+def connection_alive(entry):
+    try:
+        entry['connection'].execute(text("SELECT 1"))
+        entry['connection'].rollback()
+        return True
+    except Exception as ping_error:
+        logging.warning(f"Worker connection check failed, reconnecting: {str(ping_error)}")
+        return False
+
+
+def get_worker_connection(pool, database):
+    # Bağlantılar işçi thread'inde havuz başına turlar arasında açık kalır; farklı hedeflere yazan tablolar arasında
+    # geçişte de kapatılmaz. pool_pre_ping/pool_recycle sadece havuzdan alırken çalıştığı için aynı kontroller
+    # burada yapılır
+    now = time.monotonic()
+    with worker_connections_lock:
+        connections = worker_connections.setdefault(threading.get_ident(), {})
+        entry = connections.pop(pool, None)
+        # Uzun süredir kullanılmayan havuzların (ör. yeniden kurulan havuzun eskisi) bağlantıları da bırakılır
+        expired = [connections.pop(other) for other, other_entry in list(connections.items())
+                   if now - other_entry['opened_at'] >= POOL_RECYCLE]
+
+    for other_entry in expired:
+        close_connection(other_entry)
+    if entry and (now - entry['opened_at'] >= POOL_RECYCLE or
+                  (now - entry['used_at'] >= CONNECTION_CHECK_INTERVAL and not connection_alive(entry))):
+        close_connection(entry)
+        entry = None
+
+    if entry is None:
+        entry = open_worker_connection(pool, database)
+
+    entry['used_at'] = now
+    with worker_connections_lock:
+        worker_connections.setdefault(threading.get_ident(), {})[pool] = entry
+    return entry['connection']
+
+
+def get_worker_connections(mssql_pool, mysql_pool):
+    return get_worker_connection(mssql_pool, 'mssql'), get_worker_connection(mysql_pool, 'mysql')
+
+
+def discard_worker_connections():
+    with worker_connections_lock:
+        connections = worker_connections.pop(threading.get_ident(), {})
+    for entry in connections.values():
+        close_connection(entry)
+
+
+def close_worker_connections():
+    with worker_connections_lock:
+        connections = [entry for worker in worker_connections.values() for entry in worker.values()]
+        worker_connections.clear()
+    for entry in connections:
+        close_connection(entry)
+
+
+def sync_table(table, sync_config, table_state, mssql_pool, mysql_pool, target=DEFAULT_TARGET, connections=None,
+               min_active_rowversion=None):
+    name = state_key(resolve_target_table(table), target)
+    metrics_context.table = name
+    table_start = time.perf_counter()
+
+    # Çoklu hedefte bağlantılar (paylaşılan kaynak ve hedefin kendi bağlantısı) sync_table_targets'tan gelir
+    if connections is None:
+        conn_mssql, conn_mysql = get_worker_connections(mssql_pool, mysql_pool)
+        session_mssql = mssql_pool(bind=conn_mssql)
+    else:
+        session_mssql, conn_mysql = connections
+    snapshot = None
 
-            sync_data(session_mssql, conn_mysql, source_schema, source_table, target_table, columns, id_column,
-                      table_as_is, column_as_is, target_id=target_id, conditions=conditions, query=query)
+    try:
+        source_table = table.get('source_table')
+        source_schema = table.get('source_schema')
+        table_as_is = table.get('table_as_is', 0)
+        column_as_is = table.get('column_as_is', 0)
+        target_id = table.get('target_id', None)
+        conditions = table.get('conditions', None)
+        query = table.get('query', None)
+        target_table = resolve_target_table(table)
+        watermark_column = table.get('watermark_column', None)
+
+        # Çoklu hedefte sınır, kaynak paylaşılmadan önce sync_table_targets'ta alınır
+        if connections is None:
+            min_active_rowversion = fetch_rowversion_bound(session_mssql, table, table_state)
 
+        if column_as_is == 1:
+            columns = get_source_columns(session_mssql, source_schema, source_table)
+            columns = {col: col for col in columns}
+        else:
+            if 'columns' not in table:
+                raise Exception(f"columns must be specified in JSON because column_as_is = 0")
+            columns = table['columns']
+
+        id_column = table['id_column']
+        batch_size = table.get('batch_size', sync_config.get('batch_size', BATCH_SIZE))
+        upsert = table.get('upsert', 0) == 1
+        delete_chunk_size = table.get('delete_chunk_size', sync_config.get('delete_chunk_size', DELETE_CHUNK_SIZE))
+        max_deletes = table.get('max_deletes', sync_config.get('max_deletes', MAX_DELETES))
+        watermark_margin = table.get('watermark_margin', sync_config.get('watermark_margin', WATERMARK_MARGIN))
+        full_sync_interval = table.get('full_sync_interval',
+                                       sync_config.get('full_sync_interval', FULL_SYNC_INTERVAL))
+        streaming = table.get('streaming', sync_config.get('streaming', 1 if STREAMING else 0)) == 1
+        fetch_size = table.get('fetch_size', sync_config.get('fetch_size', FETCH_SIZE))
+        initial_load = table.get('initial_load', sync_config.get('initial_load', 1)) == 1
+        initial_load_chunk_size = table.get('initial_load_chunk_size',
+                                            sync_config.get('initial_load_chunk_size', INITIAL_LOAD_CHUNK_SIZE))
+        disable_keys = table.get('disable_keys', 0) == 1
+        compare_mode = table.get('compare_mode', sync_config.get('compare_mode', 'rows'))
+        hash_block_size = table.get('hash_block_size', None)
+        change_source = table.get('change_source', None)
+        cdc_capture_instance = table.get('cdc_capture_instance', f"{source_schema}_{source_table}")
+        change_version = decode_watermark(table_state['change_version']) if 'change_version' in table_state else None
+
+        if change_source not in (None,) + CHANGE_SOURCES:
+            raise Exception(f"Unknown change_source {change_source} for {target_table}, use change_tracking or cdc")
+        if change_source and query:
+            logging.warning(f"change_source is ignored for {target_table} because it uses a custom query.")
+        initial_load_key = decode_watermark(table_state['initial_load_key']) if 'initial_load_key' in table_state else None
+
+        snapshot_enabled = table.get('snapshot', sync_config.get('snapshot', 0)) == 1
+        snapshot_verify_interval = table.get('snapshot_verify_interval',
+                                             sync_config.get('snapshot_verify_interval', SNAPSHOT_VERIFY_INTERVAL))
+        if snapshot_enabled and compare_mode == 'hash' and not query:
+            logging.warning(f"snapshot is ignored for {target_table} because it uses compare_mode hash.")
+            snapshot_enabled = False
+
+        # Snapshot yoksa ya da doğrulama zamanı geldiyse tam tur MySQL'e karşı yapılır ve snapshot yeniden kurulur
+        verify_snapshot = False
+        if snapshot_enabled:
+            snapshot = open_snapshot(target_table, target)
+            verify_snapshot = snapshot.created or \
+                time.time() - (table_state.get('snapshot_verified') or 0) >= snapshot_verify_interval
+            snapshot.begin(rebuild=verify_snapshot)
+            if verify_snapshot:
+                logging.info(f"Verifying the local snapshot of {name} against MySQL.")
+                change_version = None
+
+        # Watermark yoksa ya da periyodik tam senkronizasyon zamanı geldiyse tüm tablo karşılaştırılır
+        watermark = None
+        full_sync = True
+        if watermark_column and 'watermark' in table_state and not verify_snapshot:
+            full_sync = time.time() - table_state.get('last_full_sync', 0) >= full_sync_interval
+            if not full_sync:
+                watermark = decode_watermark(table_state['watermark'])
+
+        stats = sync_data(session_mssql, conn_mysql, source_schema, source_table, target_table, columns, id_column,
+                          table_as_is, column_as_is, target_id=target_id, conditions=conditions, query=query,
+                          batch_size=batch_size, upsert=upsert, delete_chunk_size=delete_chunk_size,
+                          max_deletes=max_deletes, watermark_column=watermark_column, watermark=watermark,
+                          streaming=streaming, fetch_size=fetch_size, initial_load=initial_load,
+                          initial_load_key=initial_load_key, initial_load_chunk_size=initial_load_chunk_size,
+                          disable_keys=disable_keys, compare_mode=compare_mode, hash_block_size=hash_block_size,
+                          change_source=change_source, change_version=change_version,
+                          cdc_capture_instance=cdc_capture_instance, snapshot=snapshot, state_name=name,
+                          watermark_margin=watermark_margin, min_active_rowversion=min_active_rowversion)
+
+        # Her tablo kendi transaction'ında commit edilir. Snapshot MySQL'den sonra commit edilir; arada kesilirse
+        # geride kalan snapshot hataya ya da fazladan yazmaya yol açar ve doğrulama turunda düzelir
         session_mssql.commit()
         conn_mysql.commit()
+        if snapshot is not None:
+            if stats.get('initial_load'):
+                snapshot.rollback()
+            else:
+                snapshot.commit()
+
+        duration = time.perf_counter() - table_start
+        for operation in ('inserted', 'updated', 'deleted'):
+            record_metric('rows', (name, operation), stats[operation])
+        set_gauge('table_duration_seconds', (name,), duration)
+        set_gauge('last_success_timestamp_seconds', (name,), time.time())
+
+        state_update = {}
+        # Son tam karşılaştırma ve ilk yükleme süreleri --plan tahminleri için saklanır
+        if stats.get('initial_load') and stats['inserted']:
+            state_update['last_initial_load'] = {'seconds': round(duration, 3), 'rows': stats['inserted']}
+        elif stats.get('source_rows'):
+            state_update['last_full_sync_run'] = {'seconds': round(duration, 3), 'rows': stats['source_rows']}
+        if watermark_column and stats['watermark'] is not None:
+            state_update['watermark'] = encode_watermark(stats['watermark'])
+            state_update['last_full_sync'] = time.time() if full_sync else table_state.get('last_full_sync', 0)
+        elif stats.get('initial_load'):
+            # Devam eden bir ilk yüklemeden kalan eski watermark da silinir
+            state_update['watermark'] = None
+        if stats.get('change_version') is not None:
+            state_update['change_version'] = encode_watermark(stats['change_version'])
+        elif stats.get('initial_load'):
+            state_update['change_version'] = None
+        if snapshot is not None:
+            # İlk yüklemeden sonraki tur snapshot'ı MySQL'e karşı kurar
+            if stats.get('initial_load'):
+                state_update['snapshot_verified'] = None
+            elif snapshot.rebuild:
+                state_update['snapshot_verified'] = time.time()
+
+        return stats, state_update or None
+
+    except Exception:
+        # Hatadan sonra bağlantının durumu bilinmez, yarım transaction'larla birlikte kapatılıp yeniden açılır
+        session_mssql.close()
+        if connections is None:
+            discard_worker_connections()
+        # Snapshot'ın MySQL ile uyumlu olduğu artık bilinmez, bir sonraki tur doğrulama yapar
+        if snapshot is not None:
+            logging.warning(f"Discarding the local snapshot of {name} after an error.")
+            snapshot.close(remove=True)
+        raise
+
+    finally:
+        session_mssql.close()
+        if snapshot is not None:
+            snapshot.close()
+        metrics_context.table = ''
+
+
+def sync_table_targets(table, sync_config, sync_state, mssql_pool, target_pools):
+    target_table = resolve_target_table(table)
+    targets = list(target_pools)
+
+    if len(targets) == 1:
+        name = state_key(target_table, targets[0])
+        stats, state_update = sync_table(table, sync_config, sync_state.get(name, {}), mssql_pool,
+                                         target_pools[targets[0]], target=targets[0])
+        if state_update:
+            update_sync_state(name, state_update)
+        return stats, None
+
+    # Her hedef kendi thread'inde, kendi bağlantısı ve transaction'ıyla yazılır; kaynak sorguları paylaşılır.
+    # Hedeflerin hepsi işçinin o hedef için açık tuttuğu MySQL bağlantısını kullanır
+    table_states = align_target_states({target: sync_state.get(state_key(target_table, target), {})
+                                        for target in targets})
+    conn_mssql, conn_mysql = get_worker_connections(mssql_pool, target_pools[targets[0]])
+    session_mssql = mssql_pool(bind=conn_mssql)
+    connections = {targets[0]: conn_mysql}
+    results = {}
+    errors = {}
+
+    try:
+        for target in targets[1:]:
+            try:
+                connections[target] = get_worker_connection(target_pools[target], 'mysql')
+            except Exception as connect_error:
+                errors[target] = connect_error
+        # Hedefler hizalı watermark'tan okur; ilk yüklemedeki hedeflerin watermark'ı yoktur
+        min_active_rowversion = fetch_rowversion_bound(
+            session_mssql, table, next((table_states[target] for target in connections
+                                        if 'watermark' in table_states[target]), {}))
+        shared_source = SharedSource(session_mssql, mssql_pool, len(connections))
+
+        with ThreadPoolExecutor(max_workers=len(connections), thread_name_prefix='target') as executor:
+            futures = {executor.submit(sync_table, table, sync_config, table_states[target], mssql_pool,
+                                       target_pools[target], target=target,
+                                       connections=(shared_source, connections[target]),
+                                       min_active_rowversion=min_active_rowversion): target
+                       for target in connections}
+            for future in futures:
+                target = futures[future]
+                try:
+                    results[target], state_update = future.result()
+                except Exception as target_error:
+                    errors[target] = target_error
+                    continue
+                # Her hedefin watermark'ı ve checkpoint'i ayrı ilerler
+                if state_update:
+                    update_sync_state(state_key(target_table, target), state_update)
+
+        session_mssql.commit()
 
     finally:
         session_mssql.close()
-        conn_mysql.close()
+        if errors:
+            discard_worker_connections()
+
+    for target, target_error in errors.items():
+        logging.error(f"Error during synchronization of {target_table} to target {target}: {str(target_error)}")
+    if errors:
+        raise Exception(f"{len(errors)} of {len(targets)} targets failed for {target_table}: "
+                        f"{', '.join(sorted(errors))}")
+
+    return {operation: sum(stats[operation] for stats in results.values())
+            for operation in ('inserted', 'updated', 'deleted')}, None
+
+
+def load_tables(json_file):
+    # Zamanlayıcı ve --once aynı doğrulanmış konfigürasyonla çalışır
+    sync_config = load_sync_config(json_file)
+    validate_sync_config(sync_config)
+    configure_type_mappings(sync_config)
+    tables = {resolve_target_table(table): table for table in sync_config['tables']}
+    return sync_config, tables, get_table_dependencies(tables)
+
+
+def sync(json_file, mssql_pool, target_pools):
+    # --once: her tablo bağımlılık sırasıyla bir kez, zamanlayıcının kullandığı sync_table_targets ile çalışır
+    cycle_start = time.perf_counter()
+    sync_config, tables, dependencies = load_tables(json_file)
+    workers = get_worker_count(sync_config, mssql_pool, *target_pools.values())
+
+    results = {}
+    pending = dict(tables)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync') as executor:
+        while pending or running:
+            for name in list(pending):
+                depends_on = dependencies[name]
+
+                if any(dependency in results and results[dependency] is None for dependency in depends_on):
+                    logging.error(f"Skipping synchronization of {name} because a table it depends on failed.")
+                    results[name] = None
+                    del pending[name]
+                elif all(dependency in results for dependency in depends_on):
+                    table = pending.pop(name)
+                    table_pools = {target: target_pools[target] for target in get_table_targets(table, sync_config)}
+                    future = executor.submit(sync_table_targets, table, sync_config, load_sync_state(), mssql_pool,
+                                             table_pools)
+                    running[future] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = complete_table(name, future)
+
+    # Tek seferlik turda işçi thread'leri burada biter, bağlantıları havuza geri verilir
+    close_worker_connections()
+    finish_cycle(time.perf_counter() - cycle_start)
+    return results
+
+
+def complete_table(name, future):
+    # Bir tablodaki hata sadece o tablonun transaction'ını geri alır, diğer tablolar devam eder
+    try:
+        stats, state_update = future.result()
+    except Exception as table_error:
+        logging.error(f"Error during synchronization of {name}: {str(table_error)}")
+        record_metric('errors', (name,))
+        return None
+
+    # Watermark'lar yalnızca başarılı commit sonrasında ilerletilir
+    if state_update:
+        update_sync_state(name, state_update)
+
+    return stats
+
+
+def get_table_schedule(table, sync_config, default_frequency):
+    frequency = table.get('frequency', sync_config.get('frequency', default_frequency))
+    max_frequency = table.get('max_frequency', sync_config.get('max_frequency', frequency))
+    backoff_factor = table.get('backoff_factor', sync_config.get('backoff_factor', 2))
+    return frequency, max(frequency, max_frequency), backoff_factor
+
+
+def reschedule_table(entry, table, sync_config, default_frequency, stats):
+    frequency, max_frequency, backoff_factor = get_table_schedule(table, sync_config, default_frequency)
+
+    # Hata alan tablo (çoğunlukla bağlantı kopması) tam aralık beklemeden artan aralıklarla yeniden denenir
+    if stats is None:
+        entry['failures'] = entry.get('failures', 0) + 1
+        entry['interval'] = frequency
+        entry['next_due'] = time.monotonic() + min(frequency, reconnect_delay(entry['failures'] - 1))
+        return
+    entry['failures'] = 0
+
+    # Değişiklik bulmayan tablolar max_frequency'e kadar giderek daha seyrek senkronize edilir
+    idle = not (stats['inserted'] or stats['updated'] or stats['deleted'])
+    if idle and max_frequency > frequency:
+        entry['interval'] = min((entry['interval'] or frequency) * backoff_factor, max_frequency)
+    else:
+        entry['interval'] = frequency
+
+    # Bir sonraki çalışma bitiş zamanına değil planlanan zamana göre hesaplanır, böylece süre kaymaz
+    next_due = entry['next_due'] + entry['interval']
+    now = time.monotonic()
+    if next_due <= now:
+        missed = int((now - next_due) // entry['interval']) + 1
+        logging.debug(f"{entry['name']} is running behind schedule, coalescing {missed} missed runs into one.")
+        next_due = now
+    entry['next_due'] = next_due
+
+
+def run_scheduler(json_file, mssql_database, default_frequency=60):
+    sync_config = load_sync_config(json_file)
+    max_workers = max(1, sync_config.get('workers', SYNC_WORKERS))
+
+    schedule = {}
+    running = {}
+    summary_start = time.monotonic()
+    completed = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sync') as executor:
+            while True:
+                # Konfigürasyon her turda yeniden okunur, eklenen ve çıkarılan tablolar yeniden başlatmadan uygulanır
+                try:
+                    sync_config, tables, dependencies = load_tables(json_file)
+                except Exception as config_error:
+                    logging.error(f"Invalid configuration in {json_file}, keeping the previous one: {str(config_error)}")
+                    if not schedule:
+                        probe_state['scheduler_deadline'] = time.monotonic() + default_frequency + LIVENESS_GRACE
+                        time.sleep(default_frequency)
+                        continue
+
+                # Havuzlar arka planda kurulur. Tablolar hazır hedeflerine yazılır, hiçbir hedefi hazır olmayan tablo
+                # sırada bekler; geride kalan hedef kendi durumundan devam ederek sonra yetişir
+                mssql_pool = mssql_database.pool
+                target_pools = {}
+                for table in tables.values():
+                    for target in get_table_targets(table, sync_config):
+                        target_pools[target] = get_target_database(target, sync_config).pool
+                ready_pools = [pool for pool in target_pools.values() if pool is not None]
+                workers = 0
+                if mssql_pool is not None and ready_pools:
+                    workers = min(max_workers, get_worker_count(sync_config, mssql_pool, *ready_pools))
+                held_back = False
+
+                now = time.monotonic()
+                for name in tables:
+                    if name not in schedule:
+                        schedule[name] = {'name': name, 'next_due': now, 'interval': None}
+                for name in list(schedule):
+                    if name not in tables and name not in running.values():
+                        del schedule[name]
+
+                running_names = set(running.values())
+                due = [name for name in tables if name not in running_names and schedule[name]['next_due'] <= now]
+
+                # Boşta işçi sayısından fazla tablo gecikmişse önce yüksek öncelikli ve en çok gecikenler çalışır
+                due.sort(key=lambda name: (-tables[name].get('priority', 0), schedule[name]['next_due']))
+                waiting = set(due)
+                for name in due:
+                    if len(running) >= workers:
+                        break
+
+                    # Bağımlı olunan tablo çalışıyorsa ya da sırası geldiyse önce onun bitmesi beklenir
+                    if any(dependency in running_names or dependency in waiting for dependency in dependencies[name]):
+                        continue
+
+                    table_pools = {target: target_pools[target]
+                                   for target in get_table_targets(tables[name], sync_config)
+                                   if target_pools[target] is not None}
+                    if not table_pools:
+                        held_back = True
+                        continue
+
+                    future = executor.submit(sync_table_targets, tables[name], sync_config, load_sync_state(),
+                                             mssql_pool, table_pools)
+                    running[future] = name
+                    running_names.add(name)
+                    waiting.discard(name)
+
+                summary_interval = sync_config.get('frequency', default_frequency)
+                next_wake = summary_start + summary_interval
+                for name, entry in schedule.items():
+                    if name not in running_names:
+                        next_wake = min(next_wake, entry['next_due'])
+                timeout = max(0.1 if workers and not held_back else 1, next_wake - time.monotonic())
+                probe_state['scheduler_deadline'] = time.monotonic() + timeout + LIVENESS_GRACE
+
+                if running:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout)
+                    done = ()
+
+                for future in done:
+                    name = running.pop(future)
+                    stats = complete_table(name, future)
+                    completed += 1
+                    if name in schedule and name in tables:
+                        reschedule_table(schedule[name], tables[name], sync_config, default_frequency, stats)
+                    else:
+                        schedule.pop(name, None)
+
+                # Özet her tablo çalışmasında değil, en fazla frequency aralığıyla bir kez yazılır
+                if time.monotonic() - summary_start >= summary_interval:
+                    if completed:
+                        finish_cycle(time.monotonic() - summary_start)
+                    summary_start = time.monotonic()
+                    completed = 0
+    finally:
+        # İşçi thread'lerinin açık tuttuğu bağlantılar havuza geri verilir
+        close_worker_connections()
+
+
+def plan_table(table, sync_config, table_state, session_mssql, conn_mysql):
+    target_table = resolve_target_table(table)
+    source_schema = table.get('source_schema')
+    source_table = table.get('source_table')
+    query = table.get('query', None)
+    conditions = table.get('conditions', None)
+    id_column = table['id_column']
+    column_as_is = table.get('column_as_is', 0)
+    target_id = table.get('target_id', None)
+    batch_size = table.get('batch_size', sync_config.get('batch_size', BATCH_SIZE))
+    delete_chunk_size = table.get('delete_chunk_size', sync_config.get('delete_chunk_size', DELETE_CHUNK_SIZE))
+    max_deletes = table.get('max_deletes', sync_config.get('max_deletes', MAX_DELETES))
+    initial_load = table.get('initial_load', sync_config.get('initial_load', 1)) == 1
+    initial_load_chunk_size = table.get('initial_load_chunk_size',
+                                        sync_config.get('initial_load_chunk_size', INITIAL_LOAD_CHUNK_SIZE))
+    upsert = table.get('upsert', 0) == 1
+
+    if query:
+        source = f"({query}) AS q"
+        source_filters = []
+    else:
+        source = f"{source_schema}.{source_table}"
+        source_filters = [f"({conditions})"] if conditions else []
+
+    source_query = f"SELECT COUNT_BIG(*) FROM {source}"
+    if source_filters:
+        source_query += f" WHERE {' AND '.join(source_filters)}"
+    with track_phase('source_read'):
+        source_rows = session_mssql.execute(text(source_query)).scalar()
+
+    target_exists = target_table_exists(conn_mysql, target_table)
+    target_rows = 0
+    if target_exists:
+        with track_phase('target_read'):
+            target_rows = conn_mysql.execute(text(f"SELECT COUNT(*) FROM {target_table}")).scalar()
+
+    columns = dict(table.get('columns', {}))
+    if column_as_is == 1:
+        target_id = id_column
+        if not query:
+            columns = {col: col for col in get_source_columns(session_mssql, source_schema, source_table)}
+    elif target_id and not query:
+        columns[id_column] = target_id
+
+    ddl = []
+    if not target_exists and not query:
+        ddl = build_target_table_ddl(target_table, columns, session_mssql, source_schema, source_table, column_as_is,
+                                     target_id)
+
+    # Hiçbir şey yazılmaz: boş hedef ilk yükleme sayılır, diğerleri anahtar (query) ya da özet karşılaştırmasıyla tahmin edilir
+    if initial_load and target_rows == 0:
+        mode = 'initial_load'
+        inserted, updated, deleted = source_rows, 0, 0
+    elif query:
+        mode = 'key_compare'
+        with track_phase('source_read'):
+            source_ids = {row[0] for row in session_mssql.execute(text(f"SELECT {id_column} FROM {source}"))}
+        with track_phase('target_read'):
+            target_ids = {row[0] for row in conn_mysql.execute(text(f"SELECT {target_id} FROM {target_table}"))}
+        inserted, updated, deleted = len(source_ids - target_ids), None, len(target_ids - source_ids)
+    else:
+        mode = 'hash_compare'
+        comparable_columns = filter_comparable_columns(session_mssql, source_schema, source_table, columns)
+        source_columns = [id_column] + [col for col in comparable_columns.keys() if col != id_column]
+        target_columns = [target_id] + [comparable_columns[col] for col in source_columns[1:]]
+        source_hash, target_hash = build_hash_expressions(session_mssql, source_schema, source_table,
+                                                          source_columns[1:], target_columns[1:])
+        source_hashes, target_hashes = fetch_row_hashes(session_mssql, conn_mysql, source, source_filters, id_column,
+                                                        source_hash, target_table, target_id, target_hash)
+        inserted = len(source_hashes.keys() - target_hashes.keys())
+        updated = sum(1 for key, value in source_hashes.items()
+                      if key in target_hashes and target_hashes[key] != value)
+        deleted = len(target_hashes.keys() - source_hashes.keys())
+
+    if mode == 'initial_load':
+        full_chunks, last_chunk = divmod(source_rows, initial_load_chunk_size)
+        statements = {
+            'initial_load_chunks': math.ceil(source_rows / initial_load_chunk_size),
+            'insert': full_chunks * math.ceil(initial_load_chunk_size / batch_size) + math.ceil(last_chunk / batch_size),
+        }
+    elif upsert:
+        statements = {'upsert': math.ceil((inserted + (updated or 0)) / batch_size)}
+    else:
+        statements = {'insert': math.ceil(inserted / batch_size), 'update': math.ceil((updated or 0) / batch_size)}
+    statements['delete'] = math.ceil(deleted / delete_chunk_size)
+
+    # Süre, bu tablonun aynı türdeki son çalışmasının satır başına süresiyle ölçeklenir
+    history = table_state.get('last_initial_load' if mode == 'initial_load' else 'last_full_sync_run')
+    projected_seconds = None
+    if history and history.get('rows'):
+        projected_seconds = round(history['seconds'] * source_rows / history['rows'], 1)
+
+    return {
+        'table': target_table,
+        'mode': mode,
+        'source_rows': source_rows,
+        'target_rows': target_rows,
+        'target_exists': target_exists,
+        'estimated': {'inserted': inserted, 'updated': updated, 'deleted': deleted},
+        'max_deletes_exceeded': max_deletes is not None and deleted > max_deletes,
+        'ddl': ddl,
+        'statements': statements,
+        'projected_seconds': projected_seconds,
+    }
+
+
+def plan(json_file, mssql_pool, mysql_pool):
+    sync_config = load_sync_config(json_file)
+    configure_type_mappings(sync_config)
+    sync_state = load_sync_state()
+
+    plans = []
+    for table in sync_config['tables']:
+        # Plan sadece .env'deki varsayılan MySQL hedefi için çıkarılır
+        if DEFAULT_TARGET not in get_table_targets(table, sync_config):
+            continue
+        name = resolve_target_table(table)
+        metrics_context.table = name
+        session_mssql = mssql_pool()
+        conn_mysql = mysql_pool.connect()
+        try:
+            plans.append(plan_table(table, sync_config, sync_state.get(name, {}), session_mssql, conn_mysql))
+        except Exception as plan_error:
+            logging.error(f"Planning {name} failed: {str(plan_error)}")
+            plans.append({'table': name, 'error': str(plan_error)})
+        finally:
+            session_mssql.close()
+            conn_mysql.close()
+            metrics_context.table = ''
+
+    return plans
 
 
 def check_and_create_columns(cursor_source, cursor_target, source_schema, source_table, target_table, columns, table_as_is, column_as_is, target_id):
@@ -481,18 +2859,14 @@ def check_and_create_columns(cursor_source, cursor_target, source_schema, source
         columns = {col: col for col in get_source_columns(cursor_source, source_schema, source_table)}
 
 
-    cursor_target.execute(f"SHOW TABLES LIKE '{target_table}'")
-    if cursor_target.fetchall() is None:
+    if not cursor_target.execute(text(f"SHOW TABLES LIKE '{target_table}'")).fetchall():
         create_target_table(cursor_target, target_table, columns, cursor_source, source_schema, source_table, column_as_is, target_id)
         return
 
-    source_columns_query = f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = '{source_schema}' AND TABLE_NAME = '{source_table}'"
-    cursor_source.execute(source_columns_query)
-    source_columns = [row[0] for row in cursor_source.fetchall()]
+    source_columns = get_source_columns(cursor_source, source_schema, source_table)
 
     target_columns_query = f"SHOW COLUMNS FROM {target_table}"
-    cursor_target.execute(target_columns_query)
-    target_columns = [row[0] for row in cursor_target.fetchall()]
+    target_columns = [row[0] for row in cursor_target.execute(text(target_columns_query)).fetchall()]
 
     for source_col, target_col in columns.items():
         if source_col not in source_columns:
@@ -502,62 +2876,85 @@ def check_and_create_columns(cursor_source, cursor_target, source_schema, source
             data_type, constraint, seed, increment = get_column_data_type_and_identity(cursor_source, source_schema, source_table, source_col)
             alter_query = f"ALTER TABLE {target_table} ADD COLUMN {target_col} {data_type}"
             logging.info(f"Adding column to target table: {alter_query}")
-            cursor_target.execute(alter_query)
+            cursor_target.execute(text(alter_query))
 
     logging.debug(f"Column check and creation between {source_schema}.{source_table} and {target_table} completed.")
 
 def get_source_columns(cursor_source, source_schema, source_table):
-    query = f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = '{source_schema}' AND TABLE_NAME = '{source_table}'"
-    cursor_source.execute(query)
-    source_columns = [row[0] for row in cursor_source.fetchall()]
-    return source_columns
+    return list(get_table_metadata(cursor_source, source_schema, source_table).keys())
 
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Synchronize MSSQL tables to MySQL.")
+    parser.add_argument('--config', default='conf.json', help="Table configuration file (default: conf.json).")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--plan', action='store_true',
+                       help="Inspect every table without writing and print the estimated cost as JSON.")
+    group.add_argument('--check-config', action='store_true',
+                       help="Validate the configuration without connecting to either database and exit.")
+    group.add_argument('--once', action='store_true',
+                       help="Synchronize every table once and exit; the exit code is 1 if any table failed.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+
+    # Konfigürasyon hataları bağlantı beklenmeden, başlangıçta raporlanır
+    try:
+        validate_sync_config(load_sync_config(args.config))
+    except Exception as config_error:
+        logging.error(f"{args.config}: {str(config_error)}")
+        return 2
+
+    if args.check_config:
+        logging.info(f"{args.config} is valid.")
+        return 0
+
+    # --plan: tabloları yazmadan inceler ve tahmini maliyeti JSON olarak yazar
+    if args.plan:
+        mssql_pool, mssql_engine = create_mssql_pool_sqlalchemy()
+        mysql_pool = create_mysql_pool()
+        print(json.dumps(plan(args.config, mssql_pool, mysql_pool), indent=2, default=str))
+        return 0
+
+    # --once: cron gibi dış zamanlayıcılar için tek tur; bağlantılar beklenmez, kurulamazsa hata döner
+    if args.once:
+        sync_config = load_sync_config(args.config)
+        mssql_pool, mssql_engine = create_mssql_pool_sqlalchemy()
+        targets = {target for table in sync_config['tables'] for target in get_table_targets(table, sync_config)}
+        target_pools = {target: create_mysql_pool(get_target_env_prefix(target, sync_config)) for target in targets}
+        results = sync(args.config, mssql_pool, target_pools)
+        return 1 if any(stats is None for stats in results.values()) else 0
+
     try:
         logging.info("#################################################################################################################")
         logging.info("########################## PosPro Portal / DB Synchronization Service Started ###############################")
         logging.info("#################################################################################################################")
-        
-        sync_config = load_sync_config('conf.json')
+
         frequency = int(os.getenv('frequency', '60'))
 
-        mssql_pool = None
-        mysql_pool = None
+        if METRICS_PORT:
+            start_metrics_server(METRICS_PORT)
 
+        # Bağlantılar beklenmeden zamanlayıcıya geçilir, tablolar havuzlar hazır olduğunda çalışmaya başlar. MySQL
+        # hedeflerinin havuzları zamanlayıcı tarafından konfigürasyondaki hedeflere göre açılır
+        logging.info("Connecting to MySQL and MSSQL databases...")
+        mssql_database = DatabaseConnector('mssql', lambda: create_mssql_pool_sqlalchemy()[0]).start()
 
         while True:
             try:
-                logging.info("Connecting to MySQL and MSSQL databases...")
-                
-                try:
-                    mssql_pool, mssql_engine = create_mssql_pool_sqlalchemy()
-                    logging.info("MSSQL connection is successful.")
-                except Exception as mssql_error:
-                    logging.error(f"MSSQL connection failed: {str(mssql_error)}")
-                    raise mssql_error 
-
-                try:
-                    mysql_pool = create_mysql_pool()
-                    logging.info("MySQL connection is successful.")
-                except Exception as mysql_error:
-                    logging.error(f"MySQL connection failed: {str(mysql_error)}")
-                    raise mysql_error  
-                
-                logging.info("Connections to both MySQL and MSSQL databases are successful.")
-                break  
-
-            except Exception as conn_error:
-                logging.error(f"Connection Error, trying again in 1 minute: {str(conn_error)}")
-                time.sleep(60)  
-
-        while True:
-            try:
-                sync('conf.json', mssql_pool, mysql_pool)
+                run_scheduler(args.config, mssql_database, default_frequency=frequency)
             except Exception as sync_error:
                 logging.error(f"Error during synchronization: {str(sync_error)}")
-            time.sleep(frequency) 
+                time.sleep(reconnect_delay(0))
 
     except Exception as e:
         logging.error(f"Unexpected error: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
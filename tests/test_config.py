@@ -0,0 +1,13 @@
+import json
+import os
+
+import main
+
+README = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'README.md')
+
+
+def test_readme_example_config_is_valid():
+    text = open(README, encoding='utf-8').read()
+    example = text[text.index('```json') + len('```json'):]
+    example = example[:example.index('```')]
+    main.validate_sync_config(json.loads(example))
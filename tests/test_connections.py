@@ -0,0 +1,70 @@
+import pytest
+
+import main
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def execute(self, statement):
+        assert not self.closed
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    def __init__(self):
+        self.opened = []
+        self.kw = {'bind': self}
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(main, 'worker_connections', {})
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(main.time, 'monotonic', lambda: clock['now'])
+    return clock
+
+
+def test_connections_stay_warm_per_target(clock):
+    mssql, default, eu = FakePool(), FakePool(), FakePool()
+    # Varsayılan hedefe ve eu'ya yazan tablolar arasında geçiş bağlantıları kapatmaz
+    for _ in range(3):
+        main.get_worker_connections(mssql, default)
+        main.get_worker_connections(mssql, eu)
+        main.get_worker_connection(default, 'mysql')
+    assert [len(pool.opened) for pool in (mssql, default, eu)] == [1, 1, 1]
+    assert not any(connection.closed for pool in (mssql, default, eu) for connection in pool.opened)
+
+    main.discard_worker_connections()
+    assert all(connection.closed for pool in (mssql, default, eu) for connection in pool.opened)
+    assert main.worker_connections == {}
+
+
+def test_old_connections_are_recycled(clock, monkeypatch):
+    monkeypatch.setattr(main, 'POOL_RECYCLE', 100)
+    mssql, old_pool, new_pool = FakePool(), FakePool(), FakePool()
+    main.get_worker_connections(mssql, old_pool)
+
+    # Yeniden kurulan havuza geçildikten sonra eski havuzun bağlantısı da süresi dolunca kapatılır
+    clock['now'] += 50
+    main.get_worker_connections(mssql, new_pool)
+    assert not old_pool.opened[0].closed
+    clock['now'] += 60
+    main.get_worker_connection(new_pool, 'mysql')
+    assert old_pool.opened[0].closed and mssql.opened[0].closed
+    assert len(new_pool.opened) == 1
+
+    main.get_worker_connection(mssql, 'mssql')
+    assert len(mssql.opened) == 2
+    main.close_worker_connections()
+    assert mssql.opened[1].closed and new_pool.opened[0].closed
@@ -0,0 +1,221 @@
+import datetime
+import decimal
+import hashlib
+import random
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+import main
+
+
+def digest(value):
+    return hashlib.md5(repr(value).encode()).digest()
+
+
+def build_index(rows, **kwargs):
+    index = main.KeyIndex(**kwargs)
+    for key, row_digest in rows:
+        index.append(key, row_digest)
+    return index.finish()
+
+
+def build_digest_index(rows, **kwargs):
+    # Metin anahtarlar, veritabanlarının ORDER BY ile verdiği gibi anahtar özetinin sırasıyla eklenir
+    index = main.KeyIndex(key_size=16, **kwargs)
+    for key, row_digest in sorted(rows, key=lambda row: digest(row[0])):
+        index.append(digest(key), row_digest, key)
+    return index.finish()
+
+
+def diff_indexes(source_rows, target_rows, **kwargs):
+    source_index = build_index(source_rows, **kwargs)
+    target_index = build_index(target_rows, **kwargs)
+    try:
+        return main.diff_key_indexes(source_index, target_index)
+    finally:
+        source_index.close()
+        target_index.close()
+
+
+def random_tables(seed, count=5000):
+    rnd = random.Random(seed)
+    target = {key: digest(key) for key in sorted(rnd.sample(range(-count, count * 3), count))}
+    source = dict(target)
+    for key in rnd.sample(sorted(target), count // 50):
+        del source[key]
+    for key in rnd.sample(sorted(source), count // 50):
+        source[key] = digest((key, 'changed'))
+    for key in rnd.sample(range(count * 3, count * 4), count // 50):
+        source[key] = digest(key)
+    return sorted(source.items()), sorted(target.items())
+
+
+def test_empty_indexes():
+    assert diff_indexes([], []) == (set(), set(), set())
+    rows = [(key, digest(key)) for key in range(3)]
+    assert diff_indexes(rows, []) == ({0, 1, 2}, set(), set())
+    assert diff_indexes([], rows) == (set(), set(), {0, 1, 2})
+
+
+def test_duplicate_and_unordered_keys_are_rejected():
+    index = main.KeyIndex()
+    index.append(5, digest(5))
+    with pytest.raises(Exception, match="strictly ascending"):
+        index.append(5, digest(5))
+    with pytest.raises(Exception, match="strictly ascending"):
+        index.append(4, digest(4))
+    with pytest.raises(Exception, match="16 byte digest"):
+        index.append(6, b'short')
+    index.close()
+
+
+def test_negative_keys():
+    target = [(key, digest(key)) for key in range(-100, 100)]
+    source = [(key, digest((key, 'changed')) if key == -50 else digest(key)) for key in range(-120, 100) if key != -1]
+    assert diff_indexes(source, target) == (set(range(-120, -100)), {-50}, {-1})
+
+
+@pytest.mark.parametrize('run', [1, 2, 8, 1024])
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_dictionary_diff(monkeypatch, seed, run):
+    # Değişikliklerin her biri ayrı bir run sınırına düşebilir; sonuç sözlük karşılaştırmasıyla aynı olmalı
+    monkeypatch.setattr(main, 'KEY_INDEX_RUN', run)
+    source, target = random_tables(seed)
+    assert diff_indexes(source, target) == main.diff_hashes(dict(source), dict(target))
+
+
+def test_overlapping_runs_with_shifted_keys(monkeypatch):
+    # Satır içerikleri aynı, anahtarlar bir kaymış: özetler eşleşse de dilim anahtarlar hizalanmadan atlanmamalı
+    monkeypatch.setattr(main, 'KEY_INDEX_RUN', 16)
+    target = [(key, digest('same')) for key in range(0, 64)]
+    source = [(key, digest('same')) for key in range(1, 65)]
+    assert diff_indexes(source, target) == ({64}, set(), {0})
+
+
+def test_spill_to_mmap(monkeypatch):
+    monkeypatch.setattr(main, 'KEY_INDEX_RUN', 64)
+    source, target = random_tables(42)
+    # Her 10 kayıtta bir diske yazılır
+    source_index = build_index(source, memory_limit=10 * 24)
+    target_index = build_index(target, memory_limit=10 * 24)
+    try:
+        assert source_index.maps is not None and target_index.maps is not None
+        assert source_index.count == len(source)
+        assert list(source_index.keys) == [key for key, _ in source]
+        assert source_index.digest(3) == source[3][1]
+        assert main.diff_key_indexes(source_index, target_index) == main.diff_hashes(dict(source), dict(target))
+    finally:
+        source_index.close()
+        target_index.close()
+    assert source_index.files is None and source_index.count == len(source)
+
+
+def test_string_keys_compare_by_digest():
+    source = {'a': digest('a'), 'b': digest(('b', 'changed')), 'd': digest('d')}
+    target = {'a': digest('a'), 'b': digest('b'), 'c': digest('c')}
+    assert main.diff_hashes(source, target) == ({'d'}, {'b'}, {'c'})
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 10])
+def test_key_block_range_covers_each_key_once(block_size):
+    # Blok numarası iki veritabanında da sıfıra doğru yuvarlanan tam sayı bölmesidir
+    connection = sqlite3.connect(':memory:')
+    for key in range(-3 * block_size - 2, 3 * block_size + 3):
+        block = int(key / block_size)
+        matches = [candidate for candidate in range(block - 2, block + 3)
+                   if connection.execute(f"SELECT {main.key_block_range('k', candidate, block_size)} "
+                                         f"FROM (SELECT ? AS k)", (key,)).fetchone()[0]]
+        assert matches == [block], key
+    connection.close()
+
+
+def string_tables(seed):
+    source, target = random_tables(seed, count=2000)
+    return [(f"K-{key}-ş", row_digest) for key, row_digest in source], \
+        [(f"K-{key}-ş", row_digest) for key, row_digest in target]
+
+
+@pytest.mark.parametrize('memory_limit', [main.KEY_INDEX_MEMORY_LIMIT, 50 * 40])
+@pytest.mark.parametrize('seed', range(3))
+def test_digest_keys_match_dictionary_diff(monkeypatch, seed, memory_limit):
+    monkeypatch.setattr(main, 'KEY_INDEX_RUN', 8)
+    source, target = string_tables(seed)
+    source_index = build_digest_index(source, memory_limit=memory_limit)
+    target_index = build_digest_index(target, memory_limit=memory_limit)
+    try:
+        assert (source_index.maps is not None) == (memory_limit < main.KEY_INDEX_MEMORY_LIMIT)
+        # Farklı çıkan satırlar için gerçek anahtarlar döner
+        assert main.diff_key_indexes(source_index, target_index) == main.diff_hashes(dict(source), dict(target))
+        assert source_index.real_key(0) == min(source, key=lambda row: digest(row[0]))[0]
+    finally:
+        source_index.close()
+        target_index.close()
+
+
+def test_digest_key_checks():
+    index = main.KeyIndex(key_size=16)
+    index.append(digest('b'), digest(1), 'b')
+    with pytest.raises(Exception, match="16 byte key digest"):
+        index.append(b'short', digest(2), 'a')
+    with pytest.raises(Exception, match="strictly ascending"):
+        index.append(digest('b'), digest(2), 'b')
+    index.close()
+
+
+def test_digest_key_labels_keep_their_type():
+    labels = ['', 'ğ', decimal.Decimal('1.50'), datetime.date(2024, 2, 29), b'\x00\xff', 7]
+    index = build_digest_index([(label, digest(label)) for label in labels])
+    assert sorted(map(repr, (index.real_key(i) for i in range(index.count)))) == sorted(map(repr, labels))
+    index.close()
+
+
+def md5_bytes(value):
+    return hashlib.md5(str(value).encode('utf-16-le')).digest()
+
+
+@pytest.fixture
+def hash_databases(monkeypatch):
+    # SQLite'ta HASHBYTES ve UNHEX(MD5(...)) yerine aynı özeti veren fonksiyonlar kullanılır
+    engines = []
+    for _ in range(2):
+        engine = create_engine('sqlite://')
+        event.listen(engine, 'connect', lambda connection, record: (
+            connection.create_function('md5_bytes', 1, md5_bytes),
+            connection.create_function('UNHEX', 1, bytes.fromhex)))
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE items (code TEXT PRIMARY KEY, name TEXT)"))
+        engines.append(engine)
+
+    def build_hash_expressions(cursor_source, source_schema, source_table, source_columns, target_columns):
+        source = ' || '.join(source_columns)
+        target = ' || '.join(target_columns)
+        return f"md5_bytes({source})", f"hex(md5_bytes({target}))"
+
+    monkeypatch.setattr(main, 'build_hash_expressions', build_hash_expressions)
+    monkeypatch.setattr(main, 'statement_cache', {})
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def test_string_keys_reconcile_through_digest_index(hash_databases):
+    source_engine, target_engine = hash_databases
+    source_rows = [(f"K{key:04d}", f"name {key}") for key in range(300)]
+    target_rows = [(code, name + ' old' if code.endswith('7') else name) for code, name in source_rows[20:]] + \
+        [('X1', 'gone'), ('X2', 'gone')]
+    with source_engine.begin() as connection:
+        connection.execute(text("INSERT INTO items VALUES (:code, :name)"),
+                           [{'code': code, 'name': name} for code, name in source_rows])
+    with target_engine.begin() as connection:
+        connection.execute(text("INSERT INTO items VALUES (:code, :name)"),
+                           [{'code': code, 'name': name} for code, name in target_rows])
+
+    with Session(source_engine) as session_mssql, target_engine.begin() as cursor_target:
+        stats = main.reconcile_rows_by_hash(session_mssql, cursor_target, 'main', 'items', ['code', 'name'], [],
+                                            'code', 'items', ['code', 'name'], 'code', 100, key_type='nvarchar')
+    assert stats == {'inserted': 20, 'updated': 28, 'deleted': 2, 'source_rows': 300}
+    with target_engine.connect() as connection:
+        assert connection.execute(text("SELECT code, name FROM items ORDER BY code")).fetchall() == source_rows
@@ -0,0 +1,76 @@
+import pytest
+
+import main
+
+IDLE = {'inserted': 0, 'updated': 0, 'deleted': 0}
+BUSY = {'inserted': 1, 'updated': 0, 'deleted': 0}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(main.time, 'monotonic', lambda: clock['now'])
+    return clock
+
+
+def new_entry(clock):
+    return {'name': 'items', 'next_due': clock['now'], 'interval': None}
+
+
+def test_idle_table_backs_off_up_to_max_frequency(clock):
+    table = {'frequency': 10, 'max_frequency': 40}
+    entry = new_entry(clock)
+    intervals = []
+    for _ in range(4):
+        main.reschedule_table(entry, table, {}, 60, IDLE)
+        intervals.append(entry['interval'])
+    assert intervals == [20, 40, 40, 40]
+
+    # Değişiklik bulununca normal aralığa dönülür
+    main.reschedule_table(entry, table, {}, 60, BUSY)
+    assert entry['interval'] == 10
+
+
+def test_backoff_factor_and_defaults(clock):
+    entry = new_entry(clock)
+    main.reschedule_table(entry, {}, {'frequency': 5, 'max_frequency': 100, 'backoff_factor': 3}, 60, IDLE)
+    assert entry['interval'] == 15
+
+    # max_frequency yoksa boşta olsa da aralık değişmez
+    entry = new_entry(clock)
+    main.reschedule_table(entry, {}, {}, 30, IDLE)
+    assert entry['interval'] == 30
+    assert main.get_table_schedule({'frequency': 50, 'max_frequency': 20}, {}, 60) == (50, 50, 2)
+
+
+def test_next_run_follows_the_planned_time(clock):
+    entry = new_entry(clock)
+    clock['now'] += 3
+    main.reschedule_table(entry, {'frequency': 10}, {}, 60, BUSY)
+    assert entry['next_due'] == 1010
+
+
+def test_missed_runs_are_coalesced(clock):
+    entry = new_entry(clock)
+    clock['now'] += 35
+    main.reschedule_table(entry, {'frequency': 10}, {}, 60, BUSY)
+    assert entry['next_due'] == clock['now']
+
+    clock['now'] += 4
+    main.reschedule_table(entry, {'frequency': 10}, {}, 60, BUSY)
+    assert entry['next_due'] == 1045
+
+
+def test_failures_retry_with_backoff(clock, monkeypatch):
+    monkeypatch.setattr(main, 'reconnect_delay', lambda attempt: 2 ** attempt)
+    table = {'frequency': 10, 'max_frequency': 40}
+    entry = new_entry(clock)
+    delays = []
+    for _ in range(5):
+        main.reschedule_table(entry, table, {}, 60, None)
+        delays.append(entry['next_due'] - clock['now'])
+    assert delays == [1, 2, 4, 8, 10]
+    assert entry['failures'] == 5 and entry['interval'] == 10
+
+    main.reschedule_table(entry, table, {}, 60, BUSY)
+    assert entry['failures'] == 0
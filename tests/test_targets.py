@@ -0,0 +1,107 @@
+import datetime
+import threading
+
+import main
+
+
+def test_targets_read_from_the_oldest_position():
+    states = {
+        'default': {'watermark': 120, 'change_version': 9, 'last_full_sync': 200},
+        'eu': {'watermark': 100, 'change_version': 11, 'last_full_sync': 150},
+    }
+    aligned = main.align_target_states(states)
+    for target in states:
+        assert aligned[target]['watermark'] == 100
+        assert aligned[target]['change_version'] == 9
+        assert aligned[target]['last_full_sync'] == 150
+    # Girdi değiştirilmez, durum dosyasına her hedefin kendi değeri yazılır
+    assert states['default']['watermark'] == 120
+
+
+def test_encoded_watermarks_are_compared_by_value():
+    older = main.encode_watermark(datetime.datetime(2024, 1, 2, 3, 4, 5))
+    newer = main.encode_watermark(datetime.datetime(2024, 1, 10))
+    aligned = main.align_target_states({'default': {'watermark': newer}, 'eu': {'watermark': older}})
+    assert aligned['default']['watermark'] == older
+    assert main.decode_watermark(aligned['eu']['watermark']) == datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+
+def test_target_without_a_position_forces_a_full_read():
+    aligned = main.align_target_states({'default': {'watermark': 120, 'change_version': 9}, 'eu': {}})
+    for table_state in aligned.values():
+        assert 'watermark' not in table_state
+        assert 'change_version' not in table_state
+        assert table_state['last_full_sync'] == 0
+
+
+def test_initial_load_targets_are_left_out():
+    states = {
+        'default': {'watermark': 120, 'last_full_sync': 200},
+        'eu': {'initial_load_key': 5000},
+        'staging': {'watermark': 90, 'last_full_sync': 300},
+    }
+    aligned = main.align_target_states(states)
+    assert aligned['eu'] == {'initial_load_key': 5000}
+    assert aligned['default']['watermark'] == aligned['staging']['watermark'] == 90
+    assert aligned['default']['last_full_sync'] == aligned['staging']['last_full_sync'] == 200
+
+
+def test_only_initial_loads():
+    states = {'default': {'initial_load_key': 10}, 'eu': {'initial_load_key': 20}}
+    assert main.align_target_states(states) == states
+
+
+class CountingSession:
+    def __init__(self, calls):
+        self.calls = calls
+        self.closed = False
+
+    def execute(self, statement, params=None, execution_options=None):
+        self.calls.append((self, statement, execution_options))
+        return FrozenRows()
+
+    def close(self):
+        self.closed = True
+
+
+class FrozenRows:
+    def freeze(self):
+        return lambda: 'rows'
+
+
+def test_shared_source_runs_each_statement_once_and_releases_it():
+    calls = []
+    shared = main.SharedSource(CountingSession(calls), lambda: CountingSession(calls), 2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared.execute('SELECT 1', {'a': [1, 2]})))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['rows', 'rows']
+    assert len(calls) == 1
+    assert shared.results == {}
+
+
+def test_shared_source_streams_per_target_and_releases_on_close():
+    calls = []
+    main_session = CountingSession(calls)
+    shared = main.SharedSource(main_session, lambda: CountingSession(calls), 2)
+
+    shared.execute('SELECT 1', execution_options={'yield_per': 10})
+    shared.execute('SELECT 2', execution_options={'shared_source': False})
+    private_session = calls[0][0]
+    assert private_session is not main_session and calls[1][0] is private_session
+
+    # Diğer hedef bu sonucu hiç istemeden bitirse de sonuç bırakılır
+    shared.execute('SELECT 3')
+    assert len(shared.results) == 1
+    other = threading.Thread(target=shared.close)
+    other.start()
+    other.join()
+    assert shared.results == {}
+
+    shared.close()
+    shared.close()
+    assert private_session.closed and shared.participants == 0
@@ -0,0 +1,58 @@
+import datetime
+import sqlite3
+import struct
+
+from sqlalchemy import create_engine, text
+
+import main
+
+
+def raw_datetimeoffset(year, month, day, hour, minute, second, nanoseconds, offset_hours, offset_minutes):
+    return struct.pack('<6hI2h', year, month, day, hour, minute, second, nanoseconds, offset_hours, offset_minutes)
+
+
+def test_datetimeoffset_is_read_and_compared_as_mssql_text():
+    value = main.parse_datetimeoffset(raw_datetimeoffset(2024, 5, 1, 12, 30, 15, 123456700, -5, -30))
+    assert value == datetime.datetime(2024, 5, 1, 12, 30, 15, 123456,
+                                      datetime.timezone(-datetime.timedelta(hours=5, minutes=30)))
+    # CONVERT(NVARCHAR, ...) çıktısının son kesir hanesi atılmış hali
+    assert main.format_datetimeoffset(value) == '2024-05-01 12:30:15.123456 -05:30'
+    assert main.same_datetimeoffset(value, '2024-05-01 12:30:15.123456 -05:30')
+    assert not main.same_datetimeoffset(value, '2024-05-01 12:30:15.123456 +00:00')
+
+    value = main.parse_datetimeoffset(raw_datetimeoffset(1999, 12, 31, 23, 59, 59, 0, 14, 0))
+    assert main.format_datetimeoffset(value) == '1999-12-31 23:59:59.000000 +14:00'
+
+
+def test_null_datetimeoffset():
+    assert main.parse_datetimeoffset(None) is None
+    assert main.same_datetimeoffset(None, None)
+    assert not main.same_datetimeoffset(None, '2024-05-01 12:30:15.000000 +00:00')
+
+
+class ConverterConnection:
+    def __init__(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.converters = {}
+
+    def add_output_converter(self, sql_type, converter):
+        self.converters[sql_type] = converter
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def test_session_options_register_output_converters():
+    connections = []
+
+    def connect():
+        connections.append(ConverterConnection())
+        return connections[-1]
+
+    engine = create_engine('sqlite://', creator=connect)
+    main.set_session_options(engine, ["PRAGMA foreign_keys = ON"],
+                             {main.SQL_SS_TIMESTAMPOFFSET: main.parse_datetimeoffset})
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+    assert connections[0].converters == {-155: main.parse_datetimeoffset}
+    engine.dispose()
@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+
+import main
+
+
+class ScalarSession:
+    def __init__(self, values):
+        self.values = values
+        self.statements = []
+
+    def execute(self, statement, params=None, execution_options=None):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.values[self.statements[-1].split()[1]]
+
+
+def rowversion(value):
+    return value.to_bytes(8, 'big')
+
+
+def test_rowversion_mark_stays_below_open_transactions():
+    session = ScalarSession({'MAX(rv)': rowversion(500), 'MIN_ACTIVE_ROWVERSION()': rowversion(300)})
+    assert main.fetch_watermark(session, 'dbo.items', 'rv') == rowversion(299)
+
+    # Açık transaction yoksa MIN_ACTIVE_ROWVERSION bir sonraki değerdir, MAX aynen kullanılır
+    session = ScalarSession({'MAX(rv)': rowversion(500), 'MIN_ACTIVE_ROWVERSION()': rowversion(501)})
+    assert main.fetch_watermark(session, 'dbo.items', 'rv') == rowversion(500)
+
+
+def test_rowversion_bound_taken_earlier_is_used():
+    session = ScalarSession({'MAX(rv)': rowversion(0x1ff)})
+    assert main.fetch_watermark(session, 'dbo.items', 'rv', min_active_rowversion=rowversion(0x100)) == \
+        rowversion(0xff)
+    assert len(session.statements) == 1
+
+
+def test_datetime_mark_keeps_a_margin():
+    latest = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    session = ScalarSession({'MAX(modified)': latest})
+    assert main.fetch_watermark(session, 'dbo.items', 'modified', margin=90) == latest - datetime.timedelta(seconds=90)
+    assert main.fetch_watermark(session, 'dbo.items', 'modified', margin=0) == latest
+
+
+def test_other_and_empty_marks_are_unchanged():
+    assert main.fetch_watermark(ScalarSession({'MAX(id)': 42}), 'dbo.items', 'id') == 42
+    assert main.fetch_watermark(ScalarSession({'MAX(rv)': None}), 'dbo.items', 'rv') is None
+
+
+def test_watermark_margin_is_validated():
+    tables = [{'source_table': 'items', 'source_schema': 'dbo', 'id_column': 'id', 'table_as_is': 1,
+               'column_as_is': 1, 'watermark_margin': -1}]
+    with pytest.raises(Exception) as error:
+        main.validate_sync_config({'tables': tables, 'watermark_margin': 'x'})
+    assert str(error.value) == "Invalid configuration: top level: watermark_margin must be a non-negative number; " \
+                               "table items: watermark_margin must be a non-negative number"
+    main.validate_sync_config({'tables': [dict(tables[0], watermark_margin=0)]})
+
+
+class Scalar:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class MetadataSession:
+    # INFORMATION_SCHEMA sorgusuna kolon tiplerini döner, çalışan sorguları ve commit'leri sırasıyla kaydeder
+    def __init__(self, column_types):
+        self.column_types = column_types
+        self.events = []
+
+    def execute(self, statement, params=None, execution_options=None):
+        statement = ' '.join(str(statement).split())
+        self.events.append(statement.split(' FROM')[0])
+        if 'INFORMATION_SCHEMA' in statement:
+            return [(name, data_type) + (None,) * 7 for name, data_type in self.column_types.items()]
+        return Scalar(rowversion(300) if 'MIN_ACTIVE_ROWVERSION' in statement else None)
+
+    def commit(self):
+        self.events.append('COMMIT')
+
+
+ITEMS = {'source_schema': 'dbo', 'source_table': 'items', 'watermark_column': 'RV'}
+
+
+def test_rowversion_bound_opens_a_new_transaction_after_cold_metadata(monkeypatch):
+    monkeypatch.setattr(main, 'schema_cache', {})
+    session = MetadataSession({'id': 'int', 'rv': 'timestamp'})
+    assert main.fetch_rowversion_bound(session, ITEMS, {}) == rowversion(300)
+    assert session.events[-2:] == ['COMMIT', 'SELECT MIN_ACTIVE_ROWVERSION()']
+    assert len(session.events) == 4
+
+    # Önbellekteki tip ile sınır, yeni transaction'ın ilk sorgusudur
+    session = MetadataSession({})
+    assert main.fetch_rowversion_bound(session, ITEMS, {}) == rowversion(300)
+    assert session.events == ['COMMIT', 'SELECT MIN_ACTIVE_ROWVERSION()']
+
+
+def test_rowversion_bound_only_for_rowversion_watermarks(monkeypatch):
+    monkeypatch.setattr(main, 'schema_cache', {})
+    session = MetadataSession({'id': 'int', 'modified': 'datetime2'})
+    assert main.fetch_rowversion_bound(session, dict(ITEMS, watermark_column='modified'), {}) is None
+    assert 'COMMIT' not in session.events
+    assert main.fetch_rowversion_bound(session, {'source_schema': 'dbo', 'source_table': 'items'}, {}) is None
+
+    # Sorgu tablolarında tip kayıtlı watermark'tan anlaşılır
+    query = {'query': 'SELECT id, rv FROM dbo.items', 'watermark_column': 'rv'}
+    session = MetadataSession({})
+    assert main.fetch_rowversion_bound(session, query, {}) is None
+    assert main.fetch_rowversion_bound(session, query, {'watermark': main.encode_watermark(rowversion(7))}) == \
+        rowversion(300)
+    assert session.events == ['SELECT MIN_ACTIVE_ROWVERSION()']